@@ -0,0 +1,64 @@
+"""Benchmarks for the library API.
+
+Every module in this package is a script::
+
+    python -m benchmarks.checkout_contention --threads 16
+
+It configures Django with ``benchmarks.settings``, builds a fresh database and
+prints its results as JSON on stdout.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def setup(fresh=True):
+    """Configure Django for a benchmark run, optionally on a fresh database."""
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if fresh:
+        name = str(settings.DATABASES["default"]["NAME"])
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(name + suffix):
+                os.remove(name + suffix)
+
+    call_command("migrate", verbosity=0)
+
+
+def report(name, **results):
+    """Print a benchmark result as a single JSON document."""
+    json.dump({"benchmark": name, **results}, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+def latency_summary(samples, seconds):
+    """Throughput and p50/p95/p99 of latency ``samples`` in milliseconds."""
+    if len(samples) < 2:
+        return {"requests": len(samples)}
+    percentiles = statistics.quantiles(samples, n=100)
+    return {
+        "requests": len(samples),
+        "requests_per_second": round(len(samples) / seconds, 1),
+        "p50_ms": round(percentiles[49], 2),
+        "p95_ms": round(percentiles[94], 2),
+        "p99_ms": round(percentiles[98], 2),
+    }
+
+
+def timed(callable_, repeat):
+    """Median wall time of ``repeat`` calls, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        callable_()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
@@ -0,0 +1,104 @@
+"""Throughput of the async read endpoints against their sync DRF versions.
+
+Drives the ASGI handler in-process with ``AsyncClient``, keeping up to
+``--concurrency`` requests in flight, and reports requests per second and
+latency percentiles for each endpoint pair. The sync book list is served
+from the response cache once warm; the borrowing lists are not cached.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import report, setup
+
+
+async def load(client, url, headers, requests, concurrency):
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_second": round(requests / elapsed),
+        "p50_ms": round(percentiles[49], 2),
+        "p95_ms": round(percentiles[94], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--borrowings", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 500])
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import AsyncClient
+    from django.urls import reverse
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from user.models import User
+
+    seed_books(args.books)
+    seed_users(100)
+    seed_borrowings(args.borrowings, args.books, 100)
+
+    token = AccessToken.for_user(User.objects.get(pk=1))
+    endpoints = {
+        "book_list": (
+            reverse("library:book-list"),
+            reverse("library:async-book-list"),
+            {},
+        ),
+        "borrowing_list": (
+            reverse("borrowing:borrowing-list"),
+            reverse("borrowing:async-borrowing-list"),
+            {"authorization": f"Bearer {token}"},
+        ),
+    }
+
+    async def run():
+        client = AsyncClient()
+        results = {}
+        for name, (sync_url, async_url, headers) in endpoints.items():
+            for url in (sync_url, async_url):
+                # Warm up the user cache and, for the sync book list, its cache.
+                await load(client, url, headers, 10, 1)
+            results[name] = {
+                concurrency: {
+                    "sync": await load(
+                        client, sync_url, headers, args.requests, concurrency
+                    ),
+                    "async": await load(
+                        client, async_url, headers, args.requests, concurrency
+                    ),
+                }
+                for concurrency in args.concurrency
+            }
+        return results
+
+    report(
+        "async_reads",
+        books=args.books,
+        borrowings=args.borrowings,
+        requests=args.requests,
+        **asyncio.run(run()),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Throughput and peak memory of ``manage.py import_books``.
+
+Writes a ``--books`` row catalog to a CSV file, imports it into an empty
+catalog, then imports it again so every row becomes an update. The traced
+peak memory should not grow with the catalog size.
+"""
+import argparse
+import csv
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from benchmarks import report, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.core.management import call_command
+
+    from benchmarks.seed import book_title, word
+
+    runs = []
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["title", "author", "cover", "inventory", "daily_fee"])
+        for i in range(args.books):
+            writer.writerow([book_title(i), f"{word(i % 5000)} {i}", "Soft", 5, "1.50"])
+        file.flush()
+
+        for label in ("insert", "update"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            call_command("import_books", file.name, stdout=StringIO())
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            runs.append(
+                {
+                    "run": label,
+                    "seconds": round(elapsed, 2),
+                    "rows_per_second": round(args.books / elapsed),
+                    "peak_traced_megabytes": round(peak / 2**20, 2),
+                }
+            )
+
+    report("book_import", books=args.books, runs=runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Latency of the most-borrowed books ranking.
+
+Seeds a loan history, rebuilds the books' ``BookStats`` from it, then times
+the first pages of ``GET /api/books/?ordering=popularity`` (served from the
+precomputed counters, with the response cache cleared before every request)
+against the equivalent GROUP BY over the whole borrowings table.
+"""
+import argparse
+import time
+
+from benchmarks import report, setup, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--borrowings", type=int, default=1_000_000)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.core.cache import cache
+    from django.db.models import Count
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from borrowings.counters import rebuild_book_stats
+    from library.models import Book
+
+    seed_books(args.books)
+    seed_users(1000)
+    seed_borrowings(args.borrowings, args.books, 1000)
+
+    start = time.perf_counter()
+    rebuild_book_stats()
+    rebuild_seconds = time.perf_counter() - start
+
+    client = APIClient()
+    url = reverse("library:book-list")
+
+    first_page_url = f"{url}?ordering=popularity"
+    second_page_url = client.get(first_page_url).data["next"]
+
+    def api_page(page_url):
+        cache.clear()
+        return client.get(page_url)
+
+    report(
+        "book_popularity",
+        borrowings=args.borrowings,
+        books=args.books,
+        rebuild_stats_seconds=round(rebuild_seconds, 2),
+        first_page_ms=timed(lambda: api_page(first_page_url), args.repeat),
+        second_page_ms=timed(lambda: api_page(second_page_url), args.repeat),
+        group_by_query_ms=timed(
+            lambda: list(
+                Book.objects.annotate(borrows=Count("borrowing")).order_by(
+                    "-borrows", "id"
+                )[:20]
+            ),
+            args.repeat,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
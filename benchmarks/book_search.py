@@ -0,0 +1,72 @@
+"""Catalog search latency over ``--books`` titles (500k by default).
+
+Times ``GET /api/library/books/?search=...`` (FTS5, ranked) for a few query
+shapes, with the catalog cache cleared before every request, against the
+same terms as an ``icontains`` scan.
+"""
+import argparse
+import time
+
+from benchmarks import report, setup, timed
+
+QUERIES = {
+    "one_word": "zuno",
+    "two_words": "zuno curu",
+    "short_prefix": "zu",
+    "long_prefix": "folob",
+    "no_match": "qqqq",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.core.cache import cache
+    from django.db.models import Q
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from benchmarks.seed import seed_books
+    from library.models import Book
+
+    start = time.perf_counter()
+    seed_books(args.books)
+    seed_seconds = time.perf_counter() - start
+
+    client = APIClient()
+    url = reverse("library:book-list")
+
+    def search(query):
+        cache.clear()
+        return client.get(url, {"search": query})
+
+    def scan(query):
+        condition = Q()
+        for term in query.split():
+            condition &= Q(title__icontains=term) | Q(author__icontains=term)
+        return list(Book.objects.filter(condition).order_by("id")[:20])
+
+    queries = {
+        name: {
+            "first_page_hits": len(search(query).data["results"]),
+            "fts_ms": timed(lambda: search(query), args.repeat),
+            "icontains_query_ms": timed(lambda: scan(query), args.repeat),
+        }
+        for name, query in QUERIES.items()
+    }
+
+    report(
+        "book_search",
+        books=args.books,
+        seed_seconds=round(seed_seconds, 2),
+        queries=queries,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Throughput and peak memory of the streaming borrowing export.
+
+Streams ``GET /api/borrowings/export/<format>/`` over growing loan
+histories; the traced peak memory should stay flat as the row count grows.
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks import report, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--borrowings", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from borrowings.models import Borrowing
+    from user.models import User
+
+    seed_books(1000)
+    seed_users(1000)
+    staff = User.objects.create(email="staff@example.com", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(staff)
+
+    runs = []
+    for count in args.borrowings:
+        Borrowing.objects.all().delete()
+        seed_borrowings(count, 1000, 1000)
+        for export_format in ("ndjson", "csv"):
+            url = reverse(
+                "borrowing:borrowing-export", kwargs={"export_format": export_format}
+            )
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in client.get(url).streaming_content)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            runs.append(
+                {
+                    "borrowings": count,
+                    "format": export_format,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_second": round(count / elapsed),
+                    "megabytes_out": round(size / 2**20, 1),
+                    "peak_traced_megabytes": round(peak / 2**20, 2),
+                }
+            )
+
+    report("borrowing_export", runs=runs)
+
+
+if __name__ == "__main__":
+    main()
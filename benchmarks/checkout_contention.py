@@ -0,0 +1,114 @@
+"""Many threads checking out copies of one popular book at the same time.
+
+Reports checkout throughput and how many borrowings were created without a
+copy actually leaving the shelf (the oversell count, which must be 0).
+``--legacy`` runs the old read-check-save checkout for comparison.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks import report, setup
+
+
+def legacy_checkout(book_id, user):
+    from django.db import transaction
+
+    from borrowings.models import Borrowing
+    from library.models import Book
+
+    with transaction.atomic():
+        book = Book.objects.get(pk=book_id)
+        if book.inventory == 0:
+            return 400
+        book.inventory -= 1
+        book.save()
+        Borrowing.objects.create(book=book, user=user)
+    return 201
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="per thread")
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from borrowings.models import Borrowing
+    from library.models import Book
+    from user.models import User
+
+    book = Book.objects.create(
+        title="Hot title",
+        author="Hot author",
+        cover=Book.CoverForBook.SOFT,
+        inventory=args.copies,
+        daily_fee="1.00",
+    )
+    users = User.objects.bulk_create(
+        User(email=f"patron{i}@example.com") for i in range(args.threads)
+    )
+    url = reverse("borrowing:borrowing-list")
+    outcomes = {"created": 0, "out_of_stock": 0, "errors": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        counts = {"created": 0, "out_of_stock": 0, "errors": 0}
+        barrier.wait()
+        for _ in range(args.attempts):
+            try:
+                if args.legacy:
+                    status_code = legacy_checkout(book.id, user)
+                else:
+                    status_code = client.post(url, {"book": book.id}).status_code
+            except Exception:
+                status_code = None
+            if status_code == 201:
+                counts["created"] += 1
+            elif status_code == 400:
+                counts["out_of_stock"] += 1
+            else:
+                counts["errors"] += 1
+        connection.close()
+        with lock:
+            for key, value in counts.items():
+                outcomes[key] += value
+
+    threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    book.refresh_from_db()
+    borrowed = Borrowing.objects.filter(book=book).count()
+    attempts = args.threads * args.attempts
+
+    report(
+        "checkout_contention",
+        mode="legacy" if args.legacy else "conditional_update",
+        threads=args.threads,
+        attempts=attempts,
+        copies=args.copies,
+        seconds=round(elapsed, 3),
+        requests_per_second=round(attempts / elapsed, 1),
+        final_inventory=book.inventory,
+        oversold=max(borrowed - (args.copies - book.inventory), 0),
+        **outcomes,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Per-page latency of the staff borrowing list at increasing depths.
+
+Seeds ``--borrowings`` loans, then times ``GET /api/borrowings/`` pages at
+several positions in the loan history using the cursor links the API hands
+out, alongside the equivalent OFFSET query for comparison.
+"""
+import argparse
+import time
+
+from benchmarks import report, setup, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--borrowings", type=int, default=1_000_000)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.urls import reverse
+    from rest_framework.pagination import Cursor
+    from rest_framework.test import APIClient
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from borrowings.models import Borrowing
+    from library_service.pagination import NewestFirstCursorPagination
+    from user.models import User
+
+    start = time.perf_counter()
+    seed_books(args.books)
+    seed_users(args.users)
+    seed_borrowings(args.borrowings, args.books, args.users)
+    seed_seconds = time.perf_counter() - start
+
+    staff = User.objects.create(email="staff@example.com", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(staff)
+
+    url = reverse("borrowing:borrowing-list")
+    paginator = NewestFirstCursorPagination()
+    paginator.base_url = f"http://testserver{url}?page_size={args.page_size}"
+
+    pages = {}
+    for fraction in (0, 0.25, 0.5, 0.75, 0.99):
+        depth = int(args.borrowings * fraction)
+        position = args.borrowings - depth + 1
+        cursor_url = (
+            paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+            if depth
+            else paginator.base_url
+        )
+        queryset = Borrowing.objects.select_related("book").order_by("-id")
+        pages[f"depth_{depth}"] = {
+            "cursor_ms": timed(lambda: client.get(cursor_url), args.repeat),
+            "offset_query_ms": timed(
+                lambda: list(queryset[depth : depth + args.page_size]), args.repeat
+            ),
+        }
+
+    report(
+        "cursor_pagination",
+        borrowings=args.borrowings,
+        page_size=args.page_size,
+        seed_seconds=round(seed_seconds, 2),
+        pages=pages,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Concurrent read and checkout throughput, before and after database tuning.
+
+Reader threads page through their borrowings while writer threads borrow
+books, all through the API, for ``--seconds``. Runs once per profile in a
+subprocess (each needs its own settings): ``baseline`` is the stock SQLite
+backend with a rollback journal and a new connection per request, ``tuned``
+the WAL backend of ``library_service.db.sqlite3`` with persistent
+connections.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import report, setup
+
+PROFILES = ("baseline", "tuned")
+
+
+def run(args):
+    os.environ["BENCHMARK_DB_PROFILE"] = args.profile
+    setup()
+
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from user.models import User
+
+    seed_books(args.books, inventory=1000)
+    # Readers are the first users, with the loan history; writers borrow as
+    # fresh users, ten books each.
+    seed_users(args.readers + args.writers * 1000)
+    seed_borrowings(args.borrowings, args.books, args.readers)
+    patrons = list(User.objects.filter(pk__gt=args.readers))
+    connection.close()
+
+    list_url = reverse("borrowing:borrowing-list")
+    stop = threading.Event()
+    barrier = threading.Barrier(args.readers + args.writers + 1)
+    lock = threading.Lock()
+    latencies = {"read": [], "borrow": []}
+    errors = {"read": 0, "borrow": 0}
+
+    def record(kind, start, ok):
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[kind].append(elapsed)
+            errors[kind] += not ok
+
+    def reader(user_id):
+        client = APIClient()
+        client.force_authenticate(User(pk=user_id))
+        barrier.wait()
+        url = list_url
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.get(url)
+            record("read", start, response.status_code == 200)
+            url = response.status_code == 200 and response.data["next"] or list_url
+
+    def writer(users):
+        client = APIClient()
+        barrier.wait()
+        for user in users:
+            client.force_authenticate(user)
+            for _ in range(10):
+                if stop.is_set():
+                    return
+                start = time.perf_counter()
+                response = client.post(
+                    list_url, {"book": random.randint(1, args.books)}
+                )
+                record("borrow", start, response.status_code == 201)
+
+    threads = [
+        threading.Thread(target=reader, args=(user_id,))
+        for user_id in range(1, args.readers + 1)
+    ] + [
+        threading.Thread(target=writer, args=(patrons[i :: args.writers],))
+        for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    for kind, samples in latencies.items():
+        percentiles = statistics.quantiles(samples, n=100)
+        results[kind] = {
+            "requests_per_second": round(len(samples) / args.seconds, 1),
+            "p50_ms": round(percentiles[49], 2),
+            "p95_ms": round(percentiles[94], 2),
+            "errors": errors[kind],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--borrowings", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.profile:
+        json.dump(run(args), sys.stdout)
+        return
+
+    results = {}
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.database_tuning"]
+            + sys.argv[1:]
+            + ["--profile", profile],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        results[profile] = json.loads(output)
+
+    report(
+        "database_tuning",
+        readers=args.readers,
+        writers=args.writers,
+        seconds=args.seconds,
+        **results,
+    )
+
+
+if __name__ == "__main__":
+    main()
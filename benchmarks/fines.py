@@ -0,0 +1,57 @@
+"""Full and incremental runs of the set-based fine computation.
+
+Seeds a loan history, then times a full ``compute_fines`` pass, an
+incremental rerun the same day (nothing changed), and the next day's run,
+which only revisits the loans still open past their due date.
+"""
+import argparse
+import datetime
+import time
+
+from benchmarks import report, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--borrowings", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    setup()
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from borrowings.fines import compute_fines
+
+    seed_books(1000)
+    seed_users(10_000)
+    # A thousand loans a day up to today: the last year's are still open,
+    # and all but the last fortnight's are past due.
+    seed_borrowings(
+        args.borrowings,
+        1000,
+        10_000,
+        start=datetime.date.today() - datetime.timedelta(days=args.borrowings // 1000),
+    )
+
+    today = datetime.date.today()
+    runs = []
+    for label, options in (
+        ("full", {"full": True, "today": today}),
+        ("incremental_same_day", {"today": today}),
+        ("incremental_next_day", {"today": today + datetime.timedelta(days=1)}),
+    ):
+        start = time.perf_counter()
+        run = compute_fines(**options)
+        runs.append(
+            {
+                "run": label,
+                "seconds": round(time.perf_counter() - start, 3),
+                "fines_written": run.fines_written,
+                "fines_cleared": run.fines_cleared,
+            }
+        )
+
+    report("fines", borrowings=args.borrowings, runs=runs)
+
+
+if __name__ == "__main__":
+    main()
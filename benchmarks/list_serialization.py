@@ -0,0 +1,58 @@
+"""BorrowingListSerializer against the ``.values()`` fast path.
+
+Both sides run the same joined query over ``--rows`` borrowings and render
+the result to JSON; the benchmark checks that the bytes are identical.
+"""
+import argparse
+
+from benchmarks import report, setup, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from borrowings.models import Borrowing
+    from borrowings.serializers import (
+        BORROWING_LIST_VALUES,
+        BorrowingListSerializer,
+        borrowing_list_representation,
+    )
+
+    seed_books(1000)
+    seed_users(100)
+    seed_borrowings(args.rows, 1000, 100)
+
+    queryset = Borrowing.objects.select_related("book").order_by("-id")
+    renderer = JSONRenderer()
+
+    def serializer():
+        return renderer.render(BorrowingListSerializer(queryset, many=True).data)
+
+    def values():
+        return renderer.render(
+            borrowing_list_representation(queryset.values(*BORROWING_LIST_VALUES))
+        )
+
+    serializer_ms = timed(serializer, args.repeat)
+    values_ms = timed(values, args.repeat)
+
+    report(
+        "list_serialization",
+        rows=args.rows,
+        identical=serializer() == values(),
+        serializer_ms=serializer_ms,
+        values_ms=values_ms,
+        speedup=round(serializer_ms / values_ms, 2),
+    )
+
+
+if __name__ == "__main__":
+    main()
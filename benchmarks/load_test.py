@@ -0,0 +1,328 @@
+"""A mixed workload against the real URL routes, to compare runs across commits.
+
+Seeds a catalog of ``--books`` books, ``--users`` patrons with
+``--borrowings`` loans of history, a staff member and a hot title with
+``--hot-copies`` copies. Then ``--threads`` patrons, each with its own JWT,
+send requests for ``--seconds``, each time picking a workload at random with
+the ``--mix`` weights:
+
+- ``browse``: a catalog page (following the ``next`` links), a search or a
+  book
+- ``checkout``: borrowing the hot title
+- ``return``: returning the oldest loan the patron made (a checkout if it
+  has none)
+- ``staff``: the staff borrowing list, filtered by activity and date
+
+``--transport client`` sends the requests through the test client, in
+process; ``--transport wsgi`` over HTTP to Django's threaded WSGI server on
+localhost. Prints throughput, p50/p95/p99 latency and status codes for each
+workload as JSON, along with the commit and the parameters of the run::
+
+    python -m benchmarks.load_test --transport wsgi > "$(git rev-parse --short HEAD).json"
+
+The full-size dataset takes a couple of minutes to seed. ``--keep-data``
+reuses the database of the previous run instead (it must hold at least as
+many users as ``--threads``).
+"""
+import argparse
+import collections
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from benchmarks import latency_summary, report, setup
+
+WORKLOADS = ("browse", "checkout", "return", "staff")
+HOT_TITLE = "Hot title"
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ClientTransport:
+    """Requests through the test client, in this process."""
+
+    def __init__(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+
+    def request(self, method, path, token, data=None):
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        return response.status_code, response.content
+
+    def close(self):
+        pass
+
+
+class WSGITransport:
+    """Requests over a keep-alive HTTP connection to ``address``."""
+
+    def __init__(self, address):
+        self.connection = http.client.HTTPConnection(*address)
+
+    def request(self, method, path, token, data=None):
+        headers = {"Authorization": f"Bearer {token}"}
+        body = None
+        if data is not None:
+            body = json.dumps(data)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        return response.status, response.read()
+
+    def close(self):
+        self.connection.close()
+
+
+def start_server():
+    """Serve the project on a free localhost port; returns the server."""
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer,
+        WSGIRequestHandler,
+    )
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed(args):
+    from benchmarks.seed import seed_books, seed_borrowings, seed_users
+    from library.models import Book
+
+    if not args.keep_data or not Book.objects.exists():
+        seed_books(args.books)
+        seed_users(args.users)
+        seed_borrowings(args.borrowings, args.books, args.users)
+
+    hot, _ = Book.objects.update_or_create(
+        title=HOT_TITLE,
+        defaults={
+            "author": "Hot author",
+            "cover": Book.CoverForBook.HARD,
+            "inventory": args.hot_copies,
+            "daily_fee": "2.00",
+        },
+    )
+    return hot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transport", choices=("client", "wsgi"), default="client")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=int,
+        nargs=len(WORKLOADS),
+        default=[70, 10, 10, 10],
+        metavar="WEIGHT",
+        help="weights of " + ", ".join(WORKLOADS),
+    )
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--borrowings", type=int, default=10_000_000)
+    parser.add_argument("--hot-copies", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--keep-data", action="store_true")
+    args = parser.parse_args()
+
+    setup(fresh=not args.keep_data)
+
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from benchmarks.seed import word
+    from borrowings.models import Borrowing
+    from library.models import Book
+    from user.models import User
+
+    start = time.perf_counter()
+    hot = seed(args)
+    seed_seconds = time.perf_counter() - start
+    counts = {
+        "books": Book.objects.count(),
+        "users": User.objects.count(),
+        "borrowings": Borrowing.objects.count(),
+    }
+    staff, _ = User.objects.get_or_create(
+        email="staff@example.com", defaults={"is_staff": True}
+    )
+    staff_token = str(AccessToken.for_user(staff))
+    patrons = [
+        str(AccessToken.for_user(user))
+        for user in User.objects.filter(is_staff=False).order_by("pk")[: args.threads]
+    ]
+    connection.close()
+
+    book_list = reverse("library:book-list")
+    borrowing_list = reverse("borrowing:borrowing-list")
+    first_day = date(2020, 1, 1)
+    days = (date.today() - first_day).days
+
+    if args.transport == "wsgi":
+        server = start_server()
+        address = server.server_address
+
+        def transport():
+            return WSGITransport(address)
+
+    else:
+        server = None
+        transport = ClientTransport
+
+    stop = threading.Event()
+    measuring = threading.Event()
+    barrier = threading.Barrier(len(patrons) + 1)
+    results = []
+
+    def patron(index, token):
+        rng = random.Random(args.seed * 1_000_003 + index)
+        client = transport()
+        latencies = collections.defaultdict(list)
+        statuses = collections.defaultdict(collections.Counter)
+        loans = collections.deque()
+        page = book_list
+
+        barrier.wait()
+        while not stop.is_set():
+            (workload,) = rng.choices(WORKLOADS, weights=args.mix)
+            if workload == "return" and not loans:
+                workload = "checkout"
+            data, as_token = None, token
+
+            if workload == "browse":
+                kind = rng.random()
+                if kind < 0.5:
+                    method, path = "GET", page
+                elif kind < 0.8:
+                    method, path = (
+                        "GET",
+                        f"{book_list}?search={word(rng.randrange(4000))}",
+                    )
+                else:
+                    method = "GET"
+                    path = reverse(
+                        "library:book-detail", args=[rng.randint(1, counts["books"])]
+                    )
+            elif workload == "checkout":
+                method, path, data = "POST", borrowing_list, {"book": hot.pk}
+            elif workload == "return":
+                method = "GET"
+                path = reverse("borrowing:borrowing-return-borrowing", args=[loans[0]])
+            else:
+                since = first_day + timedelta(days=rng.randrange(days))
+                method, as_token = "GET", staff_token
+                path = (
+                    f"{borrowing_list}?is_active={rng.choice(['true', 'false'])}"
+                    f"&borrow_date__gte={since.isoformat()}"
+                )
+
+            sent = time.perf_counter()
+            try:
+                status, body = client.request(method, path, as_token, data)
+            except Exception:
+                status, body = "error", b""
+            elapsed = (time.perf_counter() - sent) * 1000
+
+            if measuring.is_set():
+                latencies[workload].append(elapsed)
+                statuses[workload][str(status)] += 1
+            if workload == "browse" and path == page:
+                next_link = status == 200 and json.loads(body)["next"]
+                if next_link:
+                    split = urlsplit(next_link)
+                    page = f"{split.path}?{split.query}"
+                else:
+                    page = book_list
+            elif workload == "checkout" and status == 201:
+                loans.append(json.loads(body)["id"])
+            elif workload == "return" and status in (200, 400, 404):
+                loans.popleft()
+
+        client.close()
+        connection.close()
+        results.append((latencies, statuses))
+
+    threads = [
+        threading.Thread(target=patron, args=(index, token))
+        for index, token in enumerate(patrons)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    time.sleep(args.warmup)
+    measuring.set()
+    start = time.perf_counter()
+    time.sleep(args.seconds)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+    if server is not None:
+        server.shutdown()
+
+    latencies = collections.defaultdict(list)
+    statuses = collections.defaultdict(collections.Counter)
+    for thread_latencies, thread_statuses in results:
+        for workload in WORKLOADS:
+            latencies[workload] += thread_latencies[workload]
+            statuses[workload].update(thread_statuses[workload])
+
+    report(
+        "load_test",
+        commit=git_commit(),
+        transport=args.transport,
+        threads=len(patrons),
+        seconds=args.seconds,
+        mix=dict(zip(WORKLOADS, args.mix)),
+        dataset={
+            **counts,
+            "hot_copies": args.hot_copies,
+            "seed_seconds": round(seed_seconds, 1),
+        },
+        total=latency_summary(
+            [sample for samples in latencies.values() for sample in samples], elapsed
+        ),
+        workloads={
+            workload: {
+                **latency_summary(latencies[workload], elapsed),
+                "statuses": dict(statuses[workload]),
+            }
+            for workload in WORKLOADS
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
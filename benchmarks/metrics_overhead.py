@@ -0,0 +1,59 @@
+"""Per-request cost of the metrics and query accounting middleware.
+
+Runs a request that makes one query through ``MetricsMiddleware`` and
+``QueryStatsMiddleware`` and without them, and reports the difference
+per request in microseconds, next to the cost of the ``/metrics`` render.
+"""
+import argparse
+import time
+
+from benchmarks import report, setup
+
+
+def per_call_us(callable_, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        callable_()
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.urls import resolve, reverse
+
+    from library_service.metrics import registry
+    from library_service.middleware import MetricsMiddleware, QueryStatsMiddleware
+
+    url = reverse("library:book-list")
+    request = RequestFactory().get(url)
+    request.resolver_match = resolve(url)
+
+    def view(request):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return HttpResponse()
+
+    instrumented = MetricsMiddleware(QueryStatsMiddleware(view))
+    bare_us = per_call_us(lambda: view(request), args.requests)
+    instrumented_us = per_call_us(lambda: instrumented(request), args.requests)
+
+    report(
+        "metrics_overhead",
+        requests=args.requests,
+        bare_request_us=round(bare_us, 2),
+        instrumented_request_us=round(instrumented_us, 2),
+        overhead_us=round(instrumented_us - bare_us, 2),
+        render_ms=round(per_call_us(registry.render, 100) / 1000, 3),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Settings for the benchmark scripts: production-like, on a throwaway database."""
+import os
+import tempfile
+
+os.environ.setdefault("DJANGO_SECRET_KEY", "benchmarks")
+os.environ.setdefault("DJANGO_DEBUG", "False")
+
+from library_service.settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["localhost", "127.0.0.1", "testserver"]
+
+# A handful of simulated patrons send more requests than the production
+# rates allow: keep the throttle (and its cost) but never refuse them.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    "DEFAULT_THROTTLE_RATES": {
+        scope: "1000000/sec"
+        for scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]  # noqa: F405
+    },
+}
+
+DATABASES = {
+    "default": {
+        "ENGINE": "library_service.db.sqlite3",
+        "NAME": os.environ.get(
+            "BENCHMARK_DB", os.path.join(tempfile.gettempdir(), "library_benchmark.db")
+        ),
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pragmas": {"busy_timeout": 30000}},
+    }
+}
+
+# The untuned database of old, for before/after comparisons: stock backend,
+# rollback journal, a new connection per request.
+if os.environ.get("BENCHMARK_DB_PROFILE") == "baseline":
+    DATABASES["default"].update(
+        ENGINE="django.db.backends.sqlite3",
+        CONN_MAX_AGE=0,
+        OPTIONS={"timeout": 30},
+    )
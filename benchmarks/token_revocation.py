@@ -0,0 +1,65 @@
+"""Cost of the per-request token revocation check.
+
+Revokes ``--revoked`` tokens, then times ``revoked_tokens.is_revoked`` for
+tokens that were never revoked (the common case, answered by the Bloom
+filter alone) against the indexed lookup a database blacklist would run on
+every request, and measures the filter's false positive rate.
+"""
+import argparse
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks import report, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.utils import timezone
+
+    from benchmarks.seed import insert_rows
+    from user.models import RevokedToken
+    from user.revocation import revoked_tokens
+
+    now = timezone.now()
+    insert_rows(
+        RevokedToken._meta.db_table,
+        ["jti", "expires_at", "revoked_at"],
+        ((uuid.uuid4().hex, now + timedelta(days=1), now) for _ in range(args.revoked)),
+    )
+
+    start = time.perf_counter()
+    revoked_tokens.refresh()
+    rebuild_seconds = time.perf_counter() - start
+
+    candidates = [uuid.uuid4().hex for _ in range(args.lookups)]
+    start = time.perf_counter()
+    hits = sum(revoked_tokens.is_revoked(jti) for jti in candidates)
+    filter_seconds = time.perf_counter() - start
+    false_positives = sum(jti in revoked_tokens._bloom for jti in candidates)
+
+    sample = candidates[:10_000]
+    start = time.perf_counter()
+    for jti in sample:
+        RevokedToken.objects.filter(jti=jti).exists()
+    query_seconds = time.perf_counter() - start
+
+    report(
+        "token_revocation",
+        revoked=args.revoked,
+        rebuild_seconds=round(rebuild_seconds, 3),
+        check_microseconds=round(filter_seconds / args.lookups * 1e6, 2),
+        database_lookup_microseconds=round(query_seconds / len(sample) * 1e6, 2),
+        false_positive_rate=false_positives / args.lookups,
+        wrongly_revoked=hits,
+    )
+
+
+if __name__ == "__main__":
+    main()
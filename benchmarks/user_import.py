@@ -0,0 +1,59 @@
+"""Throughput of ``manage.py import_users`` against one-at-a-time creation.
+
+Writes ``--users`` patrons to a CSV file and imports it with the command,
+then times ``create_user`` (what ``/api/users/register/`` does per user) on
+a sample of them for comparison.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from io import StringIO
+
+from benchmarks import report, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    setup()
+
+    from django.core.management import call_command
+
+    from user.models import User
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["email", "password", "first_name", "last_name"])
+        for i in range(args.users):
+            writer.writerow([f"patron{i}@example.com", f"secret-{i}", "Pat", str(i)])
+        file.flush()
+
+        start = time.perf_counter()
+        call_command(
+            "import_users", file.name, "--workers", str(args.workers), stdout=StringIO()
+        )
+        import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.sample):
+        User.objects.create_user(f"single{i}@example.com", f"secret-{i}")
+    single_seconds = time.perf_counter() - start
+
+    report(
+        "user_import",
+        users=args.users,
+        workers=args.workers,
+        import_seconds=round(import_seconds, 2),
+        import_users_per_second=round(args.users / import_seconds),
+        create_user_per_second=round(args.sample / single_seconds, 1),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 from django.contrib import admin
 
-from borrowings.models import Borrowing
+from borrowings.models import Borrowing, Fine
 
 
 @admin.register(Borrowing)
 class BorrowingAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(Fine)
+class FineAdmin(admin.ModelAdmin):
+    list_display = ("borrowing", "days_overdue", "amount", "computed_at")
@@ -0,0 +1,23 @@
+from django.http import JsonResponse
+
+from borrowings.models import Borrowing
+from borrowings.serializers import (
+    BORROWING_LIST_VALUES,
+    borrowing_list_representation,
+)
+from library_service.async_views import async_api_view
+from library_service.pagination import NewestFirstCursorPagination
+
+
+@async_api_view(authenticated=True)
+async def borrowing_list(request):
+    """Async ``GET /borrowings/``: the user's own borrowings, newest first.
+
+    Staff get their own borrowings here too; the filters of the sync list
+    are not supported.
+    """
+    rows, links = await NewestFirstCursorPagination().apaginate(
+        request,
+        Borrowing.objects.filter(user=request.user).values(*BORROWING_LIST_VALUES),
+    )
+    return JsonResponse({**links, "results": borrowing_list_representation(rows)})
@@ -0,0 +1,101 @@
+"""Rebuild the denormalized loan counters from the borrowings and fines tables.
+
+``User.active_loans``, ``overdue_loans`` and ``outstanding_fees`` and the
+books' ``BookStats`` are kept up to date as loans are made and returned and
+as fines are computed; these are the set-based recounts behind
+``compute_fines`` and ``reconcile_loan_counters``.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Count,
+    DecimalField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from borrowings.functions import DaysBetween
+from borrowings.models import Borrowing, Fine
+from library.models import Book, BookStats
+
+LOAN_COUNTERS = ("active_loans", "overdue_loans", "outstanding_fees")
+
+
+def _per_row(queryset, field, aggregate):
+    return Subquery(
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def recount_loan_counters(users, fields=LOAN_COUNTERS):
+    """Recompute ``fields`` of every user in ``users`` with one UPDATE.
+
+    Active loans are open borrowings, overdue loans the open ones carrying a
+    fine, and the outstanding fees the total of all the user's fines.
+    Returns the number of users updated.
+    """
+    counters = {
+        "active_loans": Coalesce(
+            _per_row(Borrowing.objects.filter(is_active=True), "user", Count("pk")),
+            0,
+        ),
+        "overdue_loans": Coalesce(
+            _per_row(
+                Fine.objects.filter(borrowing__is_active=True),
+                "borrowing__user",
+                Count("pk"),
+            ),
+            0,
+        ),
+        "outstanding_fees": Coalesce(
+            _per_row(Fine.objects.all(), "borrowing__user", Sum("amount")),
+            Value(Decimal(0)),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    }
+    return users.update(**{field: counters[field] for field in fields})
+
+
+def rebuild_book_stats():
+    """Recount every book's ``BookStats`` from its whole loan history.
+
+    Creates the missing rows, then rewrites all of them with one UPDATE.
+    Returns the number of books updated.
+    """
+    BookStats.objects.bulk_create(
+        [
+            BookStats(book_id=pk)
+            for pk in Book.objects.filter(stats__isnull=True).values_list(
+                "pk", flat=True
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    returned = Q(actual_return_date__isnull=False)
+    return BookStats.objects.update(
+        total_borrows=Coalesce(_per_row(Borrowing.objects, "book", Count("pk")), 0),
+        currently_out=Coalesce(
+            _per_row(Borrowing.objects.filter(~returned), "book", Count("pk")), 0
+        ),
+        total_returns=Coalesce(
+            _per_row(Borrowing.objects.filter(returned), "book", Count("pk")), 0
+        ),
+        total_loan_days=Coalesce(
+            _per_row(
+                Borrowing.objects.filter(returned),
+                "book",
+                Sum(DaysBetween("actual_return_date", "borrow_date")),
+            ),
+            0,
+        ),
+        last_borrowed=_per_row(Borrowing.objects, "book", Max("borrow_date")),
+    )
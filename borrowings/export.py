@@ -0,0 +1,62 @@
+"""Streaming NDJSON and CSV renditions of borrowing querysets.
+
+Rows are read with ``QuerySet.iterator()`` and written out a chunk at a
+time, so memory use stays flat however long the loan history is.
+"""
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_COLUMNS = {
+    "id": "id",
+    "user": "user_id",
+    "book": "book_id",
+    "book_title": "book__title",
+    "borrow_date": "borrow_date",
+    "expected_return_date": "expected_return_date",
+    "actual_return_date": "actual_return_date",
+    "is_active": "is_active",
+}
+CHUNK_SIZE = 2000
+
+
+def _chunks(queryset):
+    rows = queryset.values_list(*EXPORT_COLUMNS.values()).iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_ndjson(queryset):
+    encoder = DjangoJSONEncoder()
+    for chunk in _chunks(queryset):
+        yield "".join(
+            encoder.encode(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in chunk
+        )
+
+
+def iter_csv(queryset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(queryset):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+    "csv": (iter_csv, "text/csv"),
+}
@@ -0,0 +1,116 @@
+"""Set-based overdue detection and fine computation.
+
+Every pass is two statements however many loans it covers: an
+``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` that writes the fine of each
+overdue borrowing, computed in the database from its dates and the book's
+``daily_fee``, and a ``DELETE`` of the fines that no longer apply.
+
+Runs are incremental. A pass only looks at the borrowings that changed since
+the previous run started, plus, once the date has moved on, the open loans
+past their due date, whose overdue days grow every day. Returned loans keep
+the fine computed when they came back and are never rescanned.
+
+The overdue count and outstanding fees of the users whose borrowings were
+looked at are recounted in the same transaction.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.db.models import ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from borrowings.counters import recount_loan_counters
+from borrowings.functions import DaysBetween
+from borrowings.models import Borrowing, Fine, FineRun
+
+
+def pending_borrowings(last_run, today, full=False):
+    """The borrowings whose fine may have changed since ``last_run``."""
+    if full or last_run is None:
+        return Borrowing.objects.all()
+
+    changed = Q(updated_at__gte=last_run.started_at)
+    if today > last_run.as_of:
+        changed |= Q(is_active=True, expected_return_date__lt=today)
+    return Borrowing.objects.filter(changed)
+
+
+def with_fines(borrowings, today, computed_at):
+    """Annotate ``fine_days``, ``fine_amount`` and ``fine_computed_at``.
+
+    Open loans are overdue until ``today``; returned ones until the day
+    they came back.
+    """
+    return borrowings.annotate(
+        fine_days=DaysBetween(
+            Coalesce("actual_return_date", Value(today)), "expected_return_date"
+        ),
+        fine_amount=ExpressionWrapper(
+            F("fine_days") * F("book__daily_fee"),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ),
+        fine_computed_at=Value(computed_at, output_field=models.DateTimeField()),
+    )
+
+
+def _write_fines(borrowings):
+    """Upsert a fine for every overdue borrowing; returns the rows written."""
+    select, params = (
+        borrowings.filter(fine_days__gt=0)
+        .values_list("pk", "fine_days", "fine_amount", "fine_computed_at")
+        .query.sql_with_params()
+    )
+    quote = connection.ops.quote_name
+    sql = (
+        "INSERT INTO {table} ({borrowing}, {days}, {amount}, {computed_at}) "
+        "{select} "
+        "ON CONFLICT ({borrowing}) DO UPDATE SET "
+        "{days} = EXCLUDED.{days}, "
+        "{amount} = EXCLUDED.{amount}, "
+        "{computed_at} = EXCLUDED.{computed_at}"
+    ).format(
+        table=quote(Fine._meta.db_table),
+        borrowing=quote(Fine._meta.get_field("borrowing").column),
+        days=quote("days_overdue"),
+        amount=quote("amount"),
+        computed_at=quote("computed_at"),
+        select=select,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def compute_fines(full=False, today=None):
+    """Bring the fines and users' fee counters up to date as of ``today``.
+
+    ``full`` recomputes every borrowing instead of only the pending ones.
+    Returns the new :class:`FineRun`.
+    """
+    started_at = timezone.now()
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        last_run = FineRun.objects.select_for_update().order_by("-started_at").first()
+        borrowings = with_fines(
+            pending_borrowings(last_run, today, full), today, started_at
+        )
+        cleared, _ = Fine.objects.filter(
+            borrowing__in=borrowings.filter(
+                Q(fine_days__lte=0) | Q(fine_days__isnull=True)
+            ).values("pk")
+        ).delete()
+        written = _write_fines(borrowings)
+
+        users = get_user_model().objects.all()
+        if not full and last_run is not None:
+            users = users.filter(pk__in=borrowings.values("user_id"))
+        recount_loan_counters(users, fields=("overdue_loans", "outstanding_fees"))
+
+        return FineRun.objects.create(
+            started_at=started_at,
+            as_of=today,
+            full=full or last_run is None,
+            fines_written=written,
+            fines_cleared=cleared,
+        )
@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from borrowings.fines import compute_fines
+
+
+class Command(BaseCommand):
+    help = "Compute the overdue days and fee of late borrowings into the fines table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every borrowing, not only those changed since the last run.",
+        )
+        parser.add_argument(
+            "--date",
+            type=datetime.date.fromisoformat,
+            help="Compute fines as of this day (YYYY-MM-DD) instead of today.",
+        )
+
+    def handle(self, *args, **options):
+        run = compute_fines(full=options["full"], today=options["date"])
+        self.stdout.write(
+            f"{'Full' if run.full else 'Incremental'} run as of {run.as_of}: "
+            f"{run.fines_written} fines written, {run.fines_cleared} cleared."
+        )
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from borrowings.counters import rebuild_book_stats, recount_loan_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild every user's loan and fee counters and every book's "
+        "circulation stats from borrowings and fines."
+    )
+
+    def handle(self, *args, **options):
+        users = recount_loan_counters(get_user_model().objects.all())
+        books = rebuild_book_stats()
+        self.stdout.write(
+            f"Recounted loan counters of {users} users and stats of {books} books."
+        )
@@ -0,0 +1,8 @@
+from library_service.metrics import registry
+
+checkouts = registry.counter(
+    "library_checkouts_total",
+    "Books asked for at checkout, by result: created, out_of_stock, "
+    "not_found, loan_limit or invalid.",
+    ["result"],
+)
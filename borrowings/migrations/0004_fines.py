@@ -0,0 +1,55 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowings", "0003_borrowing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Fine",
+            fields=[
+                (
+                    "borrowing",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fine",
+                        serialize=False,
+                        to="borrowings.borrowing",
+                    ),
+                ),
+                ("days_overdue", models.PositiveIntegerField()),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("computed_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FineRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("as_of", models.DateField()),
+                ("full", models.BooleanField(default=False)),
+                ("fines_written", models.PositiveIntegerField(default=0)),
+                ("fines_cleared", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "get_latest_by": "started_at",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(fields=["updated_at"], name="borrowing_updated_at_idx"),
+        ),
+    ]
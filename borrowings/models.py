@@ -1,9 +1,12 @@
+from collections import Counter
 from datetime import datetime
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
-from library.models import Book
+from library.models import Book, BookStats
 from library_service import settings
 
 
@@ -12,6 +15,52 @@ def validate_future_date(value):
         raise ValidationError("Date cannot be in the past.")
 
 
+class BorrowingQuerySet(models.QuerySet):
+    def close(self):
+        """Mark every open borrowing in the queryset as returned today.
+
+        Closes them with one UPDATE, then puts the copies back on the shelf,
+        records the returns in the books' stats and uncounts the loans from
+        their users with one grouped UPDATE each. Must run inside a
+        transaction.
+        Returns the ids of the borrowings that were closed.
+        """
+        open_borrowings = list(
+            self.select_for_update()
+            .filter(actual_return_date__isnull=True)
+            .annotate(overdue=Exists(Fine.objects.filter(borrowing=OuterRef("pk"))))
+            .values_list(
+                "pk", "book_id", "user_id", "borrow_date", "overdue", named=True
+            )
+        )
+        if not open_borrowings:
+            return []
+
+        pks = [borrowing.pk for borrowing in open_borrowings]
+        now = timezone.now()
+        Borrowing.objects.filter(pk__in=pks).update(
+            actual_return_date=now.date(), is_active=False, updated_at=now
+        )
+
+        books = Counter()
+        loan_days = Counter()
+        for borrowing in open_borrowings:
+            books[borrowing.book_id] += 1
+            loan_days[borrowing.book_id] += (now.date() - borrowing.borrow_date).days
+        Book.objects.return_copies(books)
+        BookStats.objects.record_returns(
+            {pk: (count, loan_days[pk]) for pk, count in books.items()}
+        )
+
+        get_user_model().objects.return_loans(
+            Counter(borrowing.user_id for borrowing in open_borrowings),
+            Counter(
+                borrowing.user_id for borrowing in open_borrowings if borrowing.overdue
+            ),
+        )
+        return pks
+
+
 class Borrowing(models.Model):
     borrow_date = models.DateField(
         auto_now_add=True,
@@ -31,6 +80,53 @@ class Borrowing(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="borrowing"
     )
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BorrowingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "is_active"], name="borrowing_user_active_idx"
+            ),
+            models.Index(
+                fields=["expected_return_date"],
+                condition=Q(is_active=True),
+                name="borrowing_open_due_idx",
+            ),
+            models.Index(fields=["borrow_date"], name="borrowing_borrow_date_idx"),
+            models.Index(fields=["updated_at"], name="borrowing_updated_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} | {self.book} | {self.borrow_date}"
+
+
+class Fine(models.Model):
+    """The overdue days and fee of a late borrowing, kept by ``compute_fines``."""
+
+    borrowing = models.OneToOneField(
+        Borrowing, on_delete=models.CASCADE, primary_key=True, related_name="fine"
+    )
+    days_overdue = models.PositiveIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.borrowing} | {self.amount}"
+
+
+class FineRun(models.Model):
+    """One pass of ``compute_fines``; the latest run is the next one's watermark."""
+
+    started_at = models.DateTimeField()
+    as_of = models.DateField()
+    full = models.BooleanField(default=False)
+    fines_written = models.PositiveIntegerField(default=0)
+    fines_cleared = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        get_latest_by = "started_at"
+
+    def __str__(self):
+        return f"{self.as_of} | {self.fines_written} fines"
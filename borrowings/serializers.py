@@ -1,10 +1,19 @@
-from rest_framework import serializers
+from datetime import date
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 from borrowings.models import Borrowing
 from library.serializers import BookSerializer
+from library_service.fieldsets import SparseFieldsetSerializerMixin
+
+BULK_LIMIT = 100
+BULK_RETURN_LIMIT = 1000
+
 
+class BorrowingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {"book": BookSerializer}
 
-class BorrowingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Borrowing
         fields = (
@@ -30,8 +39,69 @@ class BorrowingListSerializer(BorrowingSerializer):
         )
 
 
+# BorrowingListSerializer field -> the ``.values()`` column it shows.
+BORROWING_LIST_COLUMNS = {
+    "id": "id",
+    "borrow_date": "borrow_date",
+    "expected_return_date": "expected_return_date",
+    "actual_return_date": "actual_return_date",
+    "book": "book__title",
+    "is_active": "is_active",
+}
+
+BORROWING_LIST_VALUES = tuple(BORROWING_LIST_COLUMNS.values())
+
+_DATE_FIELDS = {"borrow_date", "expected_return_date", "actual_return_date"}
+
+
+def _format_date(value, output_format):
+    if output_format is None or value is None or isinstance(value, str):
+        return value
+    if output_format.lower() == ISO_8601:
+        return value.isoformat()
+    return value.strftime(output_format)
+
+
+def borrowing_list_representation(rows, fields=None):
+    """Render ``.values(*BORROWING_LIST_VALUES)`` rows like BorrowingListSerializer.
+
+    Builds the response dicts directly from the joined values rows, without
+    model instances or per-row serializer field calls; the output is
+    identical to ``BorrowingListSerializer(..., many=True).data``. With
+    ``fields``, the rows only need (and the dicts only get) those fields'
+    columns.
+    """
+    date_format = api_settings.DATE_FORMAT
+    if fields is not None:
+        columns = [(name, BORROWING_LIST_COLUMNS[name]) for name in fields]
+        return [
+            {
+                name: (
+                    _format_date(row[column], date_format)
+                    if name in _DATE_FIELDS
+                    else row[column]
+                )
+                for name, column in columns
+            }
+            for row in rows
+        ]
+    return [
+        {
+            "id": row["id"],
+            "borrow_date": _format_date(row["borrow_date"], date_format),
+            "expected_return_date": _format_date(
+                row["expected_return_date"], date_format
+            ),
+            "actual_return_date": _format_date(row["actual_return_date"], date_format),
+            "book": row["book__title"],
+            "is_active": row["is_active"],
+        }
+        for row in rows
+    ]
+
+
 class BorrowingDetailSerializer(BorrowingSerializer):
-    book = BookSerializer(many=False, read_only=True)
+    default_expand = ("book",)
 
     class Meta:
         model = Borrowing
@@ -43,3 +113,29 @@ class BorrowingDetailSerializer(BorrowingSerializer):
             "book",
             "is_active",
         )
+
+
+class BorrowingBulkItemSerializer(serializers.Serializer):
+    book = serializers.IntegerField()
+    expected_return_date = serializers.DateField(required=False)
+
+    def validate_expected_return_date(self, value):
+        if value < date.today():
+            raise serializers.ValidationError(
+                "Expected return date cannot be in the past"
+            )
+        return value
+
+
+class BorrowingBulkCreateSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=BULK_LIMIT
+    )
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    borrowings = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_RETURN_LIMIT,
+    )
@@ -0,0 +1,84 @@
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from borrowings.models import Borrowing
+from borrowings.tests.test_borrowing_api import BORROWING_URL, sample_book
+from library_service.authentication import user_cache
+from user.revocation import revoked_tokens
+
+ASYNC_BORROWING_URL = reverse("borrowing:async-borrowing-list")
+
+
+class AsyncBorrowingApiTest(TestCase):
+    def setUp(self) -> None:
+        user_cache.clear()
+        revoked_tokens.reset()
+        self.user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.token = AccessToken.for_user(self.user)
+
+    def get(self, path, **kwargs):
+        return self.request("get", path, **kwargs)
+
+    def request(self, method, path, **kwargs):
+        async def send():
+            return await getattr(self.async_client, method)(path, **kwargs)
+
+        return async_to_sync(send)()
+
+    def get_as_user(self, url, token=None):
+        return self.get(url, headers={"authorization": f"Bearer {token or self.token}"})
+
+    def test_anonymous_user_rejected(self):
+        response = self.get(ASYNC_BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", response)
+
+    def test_invalid_token_rejected(self):
+        response = self.get_as_user(ASYNC_BORROWING_URL, token="invalid")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_token_rejected(self):
+        revoked_tokens.revoke(self.token)
+
+        response = self.get_as_user(ASYNC_BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_borrowing_list_matches_sync_list(self):
+        other = get_user_model().objects.create_user("other@test.com", "testpass")
+        book = sample_book()
+        for user in (self.user, self.user, other, self.user):
+            Borrowing.objects.create(
+                book=book,
+                user=user,
+                expected_return_date=datetime.date.today(),
+            )
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        url = ASYNC_BORROWING_URL + "?page_size=2"
+        while url:
+            sync = client.get(url.replace(ASYNC_BORROWING_URL, BORROWING_URL)).json()
+            response = self.get_as_user(url)
+            page = response.json()
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(page["results"], sync["results"])
+            url = page["next"]
+
+    def test_warm_request_runs_one_query(self):
+        self.get_as_user(ASYNC_BORROWING_URL)
+
+        with self.assertNumQueries(1):
+            response = self.get_as_user(ASYNC_BORROWING_URL)
+
+        self.assertEqual(response.json()["results"], [])
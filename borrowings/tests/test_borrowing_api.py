@@ -1,16 +1,30 @@
+import csv
 import datetime
+import json
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
 from borrowings.models import Borrowing
-from borrowings.serializers import BorrowingListSerializer, BorrowingDetailSerializer
+from borrowings.serializers import (
+    BORROWING_LIST_VALUES,
+    BorrowingListSerializer,
+    BorrowingDetailSerializer,
+    borrowing_list_representation,
+)
 from library.models import Book
+from library_service.testing import QueryBudgetAssertionsMixin
 
 BORROWING_URL = reverse("borrowing:borrowing-list")
+BULK_CHECKOUT_URL = reverse("borrowing:borrowing-bulk-checkout")
+BULK_RETURN_URL = reverse("borrowing:borrowing-bulk-return")
 
 
 def sample_book(**params):
@@ -48,8 +62,9 @@ class AnonymousUserApiTest(TestCase):
         self.assertEquals(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class AuthenticatedBorrowingApiTest(TestCase):
+class AuthenticatedBorrowingApiTest(QueryBudgetAssertionsMixin, TestCase):
     def setUp(self) -> None:
+        caches["throttle"].clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "testUser@test.com", "testpass"
@@ -64,13 +79,141 @@ class AuthenticatedBorrowingApiTest(TestCase):
         Borrowing.objects.create(user=self.user, book=book)
         Borrowing.objects.create(user=self.user, book=book2)
 
-        borrowings = Borrowing.objects.all()
+        borrowings = Borrowing.objects.order_by("-id")
 
         serializer = BorrowingListSerializer(borrowings, many=True)
 
         response = self.client.get(BORROWING_URL)
         self.assertEquals(response.status_code, status.HTTP_200_OK)
-        self.assertEquals(response.data, serializer.data)
+        self.assertWithinQueryBudget(response)
+        self.assertEquals(response.data["results"], serializer.data)
+
+    def test_borrowing_list_single_query(self):
+        for i in range(5):
+            book = sample_book(title=f"Title{i}", author=f"Author{i}")
+            Borrowing.objects.create(user=self.user, book=book)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(BORROWING_URL)
+
+        self.assertEquals(len(response.data["results"]), 5)
+
+    def test_borrowing_list_representation_matches_serializer(self):
+        book = sample_book()
+        book2 = sample_book(title="TestTiltle22", author="TestAuthor22")
+        Borrowing.objects.create(user=self.user, book=book, expected_return_date=None)
+        Borrowing.objects.create(
+            user=self.user,
+            book=book2,
+            actual_return_date=datetime.date.today(),
+            is_active=False,
+        )
+        borrowings = Borrowing.objects.order_by("id")
+
+        renderer = JSONRenderer()
+        self.assertEquals(
+            renderer.render(
+                borrowing_list_representation(borrowings.values(*BORROWING_LIST_VALUES))
+            ),
+            renderer.render(BorrowingListSerializer(borrowings, many=True).data),
+        )
+
+    def test_borrowing_list_sparse_fields(self):
+        book = sample_book()
+        Borrowing.objects.create(user=self.user, book=book)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(BORROWING_URL, {"fields": "id,is_active"})
+
+        self.assertEquals(
+            response.data["results"],
+            [{"id": Borrowing.objects.get().id, "is_active": True}],
+        )
+        self.assertNotIn("library_book", queries.captured_queries[-1]["sql"])
+
+    def test_borrowing_list_sparse_fields_paged(self):
+        books = [sample_book(title=f"Title{i}", author=f"Author{i}") for i in range(3)]
+        for book in books:
+            Borrowing.objects.create(user=self.user, book=book)
+
+        titles = []
+        response = self.client.get(BORROWING_URL, {"fields": "book", "page_size": 1})
+        while True:
+            self.assertEquals(response.status_code, status.HTTP_200_OK)
+            titles += [row["book"] for row in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEquals(titles, ["Title2", "Title1", "Title0"])
+        self.assertEquals(response.data["results"], [{"book": "Title0"}])
+
+    def test_borrowing_list_expand_book(self):
+        book = sample_book()
+        Borrowing.objects.create(user=self.user, book=book)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                BORROWING_URL, {"expand": "book", "fields": "id,book.title"}
+            )
+
+        self.assertEquals(
+            response.data["results"],
+            [{"id": Borrowing.objects.get().id, "book": {"title": book.title}}],
+        )
+
+    def test_borrowing_sparse_fields_select_columns(self):
+        book = sample_book()
+        borrowing = Borrowing.objects.create(user=self.user, book=book)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                BORROWING_URL, {"expand": "book", "fields": "id,book.title"}
+            )
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"library_book"."title"', sql)
+        self.assertNotIn('"library_book"."daily_fee"', sql)
+        self.assertNotIn('"borrowings_borrowing"."borrow_date"', sql)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                detail_url(borrowing.id), {"fields": "id,is_active"}
+            )
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertEquals(response.data, {"id": borrowing.id, "is_active": True})
+        self.assertIn('"borrowings_borrowing"."is_active"', sql)
+        self.assertNotIn('"borrowings_borrowing"."borrow_date"', sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_borrowing_detail_collapse_book(self):
+        book = sample_book()
+        borrowing = Borrowing.objects.create(user=self.user, book=book)
+
+        response = self.client.get(
+            detail_url(borrowing.id), {"expand": "", "fields": "id,book"}
+        )
+
+        self.assertEquals(response.data, {"id": borrowing.id, "book": book.id})
+
+    def test_borrowing_unknown_expansion_rejected(self):
+        response = self.client.get(BORROWING_URL, {"expand": "user"})
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_borrowing_detail_conditional_get(self):
+        book = sample_book()
+        borrowing = Borrowing.objects.create(user=self.user, book=book)
+        url = detail_url(borrowing.id)
+
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        book.inventory = 1
+        book.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
 
     def test_show_borrowing_detail(self):
         book = sample_book()
@@ -82,6 +225,7 @@ class AuthenticatedBorrowingApiTest(TestCase):
         response = self.client.get(url)
 
         self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
         self.assertEquals(response.data, serializer.data)
 
     def test_create_borrowing(self):
@@ -92,6 +236,7 @@ class AuthenticatedBorrowingApiTest(TestCase):
         response = self.client.post(BORROWING_URL, data=data)
 
         self.assertEquals(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
 
     def test_create_borrowing_with_expected_return_date(self):
         book = sample_book()
@@ -109,8 +254,58 @@ class AuthenticatedBorrowingApiTest(TestCase):
             reverse("borrowing:borrowing-return-borrowing", args=[borrowing.id])
         )
         self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
         self.assertFalse(response.data.get("is_active"))
 
+    def test_return_borrowing_restores_inventory(self):
+        book = sample_book(inventory=1)
+        self.client.post(BORROWING_URL, {"book": book.id})
+        borrowing = Borrowing.objects.get(book=book)
+
+        response = self.client.get(
+            reverse("borrowing:borrowing-return-borrowing", args=[borrowing.id])
+        )
+        book.refresh_from_db()
+        borrowing.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(book.inventory, 1)
+        self.assertFalse(borrowing.is_active)
+        self.assertEquals(borrowing.actual_return_date, datetime.date.today())
+
+    def test_bulk_return(self):
+        book = sample_book(inventory=1)
+        book2 = sample_book(title="TestTiltle22", author="TestAuthor22")
+        other_user = get_user_model().objects.create_user("other@test.com", "testpass")
+
+        first = Borrowing.objects.create(user=self.user, book=book)
+        second = Borrowing.objects.create(user=self.user, book=book)
+        third = Borrowing.objects.create(user=self.user, book=book2)
+        returned = Borrowing.objects.create(
+            user=self.user, book=book2, actual_return_date=datetime.date.today()
+        )
+        foreign = Borrowing.objects.create(user=other_user, book=book2)
+
+        payload = {
+            "borrowings": [first.id, second.id, third.id, returned.id, foreign.id]
+        }
+        response = self.client.post(BULK_RETURN_URL, payload, format="json")
+        book.refresh_from_db()
+        book2.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+        self.assertEquals(response.data["returned"], [first.id, second.id, third.id])
+        self.assertEquals(response.data["already_returned"], [returned.id])
+        self.assertEquals(response.data["not_found"], [foreign.id])
+        self.assertEquals(book.inventory, 3)
+        self.assertEquals(book2.inventory, 5)
+        self.assertFalse(
+            Borrowing.objects.filter(
+                user=self.user, actual_return_date__isnull=True
+            ).exists()
+        )
+
     def test_return_already_returned_borrowing(self):
         book = sample_book()
         borrowing = Borrowing.objects.create(
@@ -135,6 +330,66 @@ class AuthenticatedBorrowingApiTest(TestCase):
 
         self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_borrowing_decrements_inventory(self):
+        book = sample_book(inventory=1)
+
+        response = self.client.post(BORROWING_URL, {"book": book.id})
+        book.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_201_CREATED)
+        self.assertEquals(book.inventory, 0)
+
+        response = self.client.post(BORROWING_URL, {"book": book.id})
+        book.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(book.inventory, 0)
+        self.assertEquals(Borrowing.objects.filter(book=book).count(), 1)
+
+    def test_create_borrowing_book_not_found(self):
+        response = self.client.post(BORROWING_URL, {"book": 999})
+
+        self.assertEquals(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_checkout(self):
+        book = sample_book(inventory=1)
+        book2 = sample_book(title="TestTiltle22", author="TestAuthor22")
+        past_date = datetime.date.today() - datetime.timedelta(days=1)
+
+        payload = {
+            "items": [
+                {"book": book.id},
+                {"book": book2.id, "expected_return_date": "2100-01-01"},
+                {"book": book.id},
+                {"book": 999},
+                {"book": book2.id, "expected_return_date": past_date},
+            ]
+        }
+        response = self.client.post(BULK_CHECKOUT_URL, payload, format="json")
+        results = response.data["results"]
+        book.refresh_from_db()
+        book2.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
+        self.assertEquals(results[0]["borrowing"]["book"], book.id)
+        self.assertEquals(results[1]["borrowing"]["expected_return_date"], "2100-01-01")
+        self.assertEquals(results[2]["error"], "Book is out of stock")
+        self.assertEquals(results[3]["error"], "Book not found")
+        self.assertIn("expected_return_date", results[4]["errors"])
+        self.assertEquals(book.inventory, 0)
+        self.assertEquals(book2.inventory, 3)
+        self.assertEquals(Borrowing.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_checkout_nothing_borrowed(self):
+        book = sample_book(inventory=0)
+
+        payload = {"items": [{"book": book.id}]}
+        response = self.client.post(BULK_CHECKOUT_URL, payload, format="json")
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Borrowing.objects.exists())
+
     def test_create_borrowing_with_past_expected_return_date(self):
         past_data = datetime.date.today() - datetime.timedelta(days=1)
 
@@ -147,6 +402,65 @@ class AuthenticatedBorrowingApiTest(TestCase):
         self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class BorrowingExportApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin.test@test.com", "testpass", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        book = sample_book()
+        self.borrowing = Borrowing.objects.create(user=self.user, book=book)
+        self.returned = Borrowing.objects.create(
+            user=self.admin,
+            book=book,
+            actual_return_date=datetime.date.today(),
+            is_active=False,
+        )
+
+    def export(self, export_format, **params):
+        url = reverse(
+            "borrowing:borrowing-export", kwargs={"export_format": export_format}
+        )
+        response = self.client.get(url, params)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        self.client.force_authenticate(self.admin)
+
+        rows = [json.loads(line) for line in self.export("ndjson").splitlines()]
+
+        self.assertEquals(
+            [row["id"] for row in rows], [self.borrowing.id, self.returned.id]
+        )
+        self.assertEquals(rows[0]["book_title"], "Testtitle")
+        self.assertEquals(rows[0]["user"], self.user.id)
+        self.assertEquals(rows[1]["actual_return_date"], str(datetime.date.today()))
+
+    def test_export_csv_with_filters(self):
+        self.client.force_authenticate(self.admin)
+        today = str(datetime.date.today())
+
+        lines = self.export("csv", is_active="false", borrow_date__gte=today)
+        rows = list(csv.reader(lines.splitlines()))
+
+        self.assertEquals(rows[0][:4], ["id", "user", "book", "book_title"])
+        self.assertEquals([row[0] for row in rows[1:]], [str(self.returned.id)])
+
+        lines = self.export("csv", borrow_date__lte="2000-01-01")
+        self.assertEquals(len(lines.splitlines()), 1)
+
+    def test_export_only_own_borrowings(self):
+        self.client.force_authenticate(self.user)
+
+        rows = [json.loads(line) for line in self.export("ndjson").splitlines()]
+
+        self.assertEquals([row["id"] for row in rows], [self.borrowing.id])
+
+
 class AdminBorrowingApiTest(TestCase):
     def setUp(self) -> None:
         self.client = APIClient()
@@ -165,11 +479,11 @@ class AdminBorrowingApiTest(TestCase):
         Borrowing.objects.create(user=self.user, book=book1)
         Borrowing.objects.create(user=self.user, book=book2)
 
-        borrowings = Borrowing.objects.all()
+        borrowings = Borrowing.objects.order_by("-id")
 
         serializer = BorrowingListSerializer(borrowings, many=True)
 
         response = self.client.get(BORROWING_URL)
 
         self.assertEquals(response.status_code, status.HTTP_200_OK)
-        self.assertEquals(response.data, serializer.data)
+        self.assertEquals(response.data["results"], serializer.data)
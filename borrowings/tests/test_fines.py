@@ -0,0 +1,99 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from borrowings.fines import compute_fines
+from borrowings.models import Borrowing, Fine
+from library.models import Book
+
+TODAY = datetime.date(2023, 9, 20)
+
+
+def days_ago(days):
+    return TODAY - datetime.timedelta(days=days)
+
+
+class ComputeFinesTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.book = Book.objects.create(
+            title="Testtitle",
+            author="TestAuthor",
+            cover=Book.CoverForBook.SOFT,
+            inventory=4,
+            daily_fee="1.50",
+        )
+
+    def borrow(self, **params):
+        return Borrowing.objects.create(user=self.user, book=self.book, **params)
+
+    def test_fines_for_late_loans(self):
+        open_late = self.borrow(expected_return_date=days_ago(4))
+        returned_late = self.borrow(
+            expected_return_date=days_ago(10),
+            actual_return_date=days_ago(7),
+            is_active=False,
+        )
+        self.borrow(expected_return_date=days_ago(-3))
+        self.borrow(
+            expected_return_date=days_ago(2),
+            actual_return_date=days_ago(5),
+            is_active=False,
+        )
+
+        run = compute_fines(today=TODAY)
+
+        self.assertEqual(run.fines_written, 2)
+        self.assertEqual(
+            {
+                fine.borrowing_id: (fine.days_overdue, fine.amount)
+                for fine in Fine.objects.all()
+            },
+            {
+                open_late.id: (4, Decimal("6.00")),
+                returned_late.id: (3, Decimal("4.50")),
+            },
+        )
+
+    def test_incremental_runs(self):
+        open_late = self.borrow(expected_return_date=days_ago(4))
+        extended = self.borrow(expected_return_date=days_ago(1))
+        self.borrow(
+            expected_return_date=days_ago(10),
+            actual_return_date=days_ago(7),
+            is_active=False,
+        )
+        self.assertEqual(compute_fines(today=TODAY).fines_written, 3)
+
+        self.assertEqual(compute_fines(today=TODAY).fines_written, 0)
+
+        extended.expected_return_date = days_ago(-7)
+        extended.save()
+        run = compute_fines(today=TODAY)
+        self.assertEqual((run.fines_written, run.fines_cleared), (0, 1))
+
+        run = compute_fines(today=TODAY + datetime.timedelta(days=1))
+        self.assertEqual(run.fines_written, 1)
+        self.assertEqual(Fine.objects.get(borrowing=open_late).days_overdue, 5)
+        self.assertFalse(Fine.objects.filter(borrowing=extended).exists())
+
+    def test_command(self):
+        self.borrow(expected_return_date=days_ago(4))
+        out = StringIO()
+
+        call_command("compute_fines", "--date", str(TODAY), stdout=out)
+        call_command("compute_fines", "--date", str(TODAY), "--full", stdout=out)
+
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                f"Full run as of {TODAY}: 1 fines written, 0 cleared.",
+                f"Full run as of {TODAY}: 1 fines written, 0 cleared.",
+            ],
+        )
@@ -0,0 +1,193 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from borrowings.fines import compute_fines
+from borrowings.models import Borrowing
+from library.models import Book, BookStats
+
+BORROWING_URL = reverse("borrowing:borrowing-list")
+BULK_CHECKOUT_URL = reverse("borrowing:borrowing-bulk-checkout")
+PROFILE_URL = reverse("user:profile")
+
+
+def sample_book(**params):
+    defaults = {
+        "title": "Testtitle",
+        "author": "TestAuthor",
+        "cover": Book.CoverForBook.SOFT,
+        "inventory": 4,
+        "daily_fee": "1.50",
+    }
+    defaults.update(**params)
+    return Book.objects.create(**defaults)
+
+
+def return_url(borrowing_id):
+    return reverse("borrowing:borrowing-return-borrowing", args=[borrowing_id])
+
+
+class LoanCountersTest(TestCase):
+    def setUp(self) -> None:
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.book = sample_book()
+
+    def counters(self):
+        self.user.refresh_from_db()
+        return (
+            self.user.active_loans,
+            self.user.overdue_loans,
+            self.user.outstanding_fees,
+        )
+
+    def test_checkout_and_return(self):
+        response = self.client.post(BORROWING_URL, {"book": self.book.id})
+        self.assertEqual(self.counters(), (1, 0, 0))
+
+        profile = self.client.get(PROFILE_URL)
+        self.assertEqual(profile.data["active_loans"], 1)
+        self.assertEqual(profile.data["overdue_loans"], 0)
+        self.assertEqual(profile.data["outstanding_fees"], "0.00")
+
+        self.client.get(return_url(response.data["id"]))
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_failed_checkout_is_not_counted(self):
+        self.client.post(
+            BORROWING_URL,
+            {"book": sample_book(title="Other", author="Other", inventory=0).id},
+        )
+        self.client.post(BORROWING_URL, {"book": 999})
+
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    @override_settings(MAX_ACTIVE_LOANS=1)
+    def test_max_loans(self):
+        self.client.post(BORROWING_URL, {"book": self.book.id})
+
+        with self.assertNumQueries(3):
+            response = self.client.post(BORROWING_URL, {"book": self.book.id})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"error": "Loan limit reached"})
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 3)
+        self.assertEqual(self.counters(), (1, 0, 0))
+
+    @override_settings(MAX_ACTIVE_LOANS=2)
+    def test_bulk_checkout_max_loans(self):
+        other = sample_book(title="Other", author="Other")
+
+        response = self.client.post(
+            BULK_CHECKOUT_URL,
+            {"items": [{"book": 999}, {"book": self.book.id}, {"book": other.id}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["results"]
+        self.assertEqual(results[0]["error"], "Book not found")
+        self.assertIn("borrowing", results[1])
+        self.assertEqual(results[2]["error"], "Loan limit reached")
+        self.assertEqual(self.counters(), (1, 0, 0))
+
+    def test_fines_update_counters(self):
+        today = datetime.date.today()
+        late = Borrowing.objects.create(
+            user=self.user,
+            book=self.book,
+            expected_return_date=today - datetime.timedelta(days=2),
+        )
+        get_user_model().objects.filter(pk=self.user.pk).update(active_loans=1)
+
+        compute_fines()
+        self.assertEqual(self.counters(), (1, 1, Decimal("3.00")))
+
+        self.client.get(return_url(late.id))
+        self.assertEqual(self.counters(), (0, 0, Decimal("3.00")))
+
+    def test_profile_update_keeps_counters(self):
+        self.client.post(BORROWING_URL, {"book": self.book.id})
+
+        self.client.patch(PROFILE_URL, {"password": "newpass"})
+
+        self.assertEqual(self.counters(), (1, 0, 0))
+        self.assertTrue(self.user.check_password("newpass"))
+
+    def test_reconcile_command(self):
+        Borrowing.objects.create(user=self.user, book=self.book)
+        Borrowing.objects.create(user=self.user, book=self.book, is_active=False)
+        get_user_model().objects.filter(pk=self.user.pk).update(overdue_loans=3)
+
+        call_command("reconcile_loan_counters", stdout=StringIO())
+
+        self.assertEqual(self.counters(), (1, 0, 0))
+
+
+class BookStatsTest(TestCase):
+    def setUp(self) -> None:
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.book = sample_book()
+
+    def stats(self):
+        stats = BookStats.objects.get(book=self.book)
+        return (
+            stats.total_borrows,
+            stats.currently_out,
+            stats.total_returns,
+            stats.average_loan_days,
+            stats.last_borrowed,
+        )
+
+    def test_checkout_and_return(self):
+        today = datetime.date.today()
+        self.assertEqual(self.stats(), (0, 0, 0, None, None))
+
+        response = self.client.post(BORROWING_URL, {"book": self.book.id})
+        self.client.post(
+            BULK_CHECKOUT_URL,
+            {"items": [{"book": self.book.id}, {"book": self.book.id}]},
+            format="json",
+        )
+        self.assertEqual(self.stats(), (3, 3, 0, None, today))
+
+        Borrowing.objects.filter(pk=response.data["id"]).update(
+            borrow_date=today - datetime.timedelta(days=6)
+        )
+        self.client.get(return_url(response.data["id"]))
+        self.assertEqual(self.stats(), (3, 2, 1, 6, today))
+
+    def test_reconcile_command_rebuilds_stats(self):
+        today = datetime.date.today()
+        Borrowing.objects.create(user=self.user, book=self.book)
+        returned = Borrowing.objects.create(
+            user=self.user,
+            book=self.book,
+            actual_return_date=today,
+            is_active=False,
+        )
+        Borrowing.objects.filter(pk=returned.pk).update(
+            borrow_date=today - datetime.timedelta(days=4)
+        )
+
+        call_command("reconcile_loan_counters", stdout=StringIO())
+
+        self.assertEqual(self.stats(), (2, 1, 1, 4, today))
@@ -0,0 +1,128 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from borrowings.models import Borrowing
+from library.models import Book
+from library_service.testing import FULL_SCAN, QueryPlanAssertionsMixin
+
+BORROWING_URL = reverse("borrowing:borrowing-list")
+
+
+def sample_book(**params):
+    defaults = {
+        "title": "Testtitle",
+        "author": "TestAuthor",
+        "cover": Book.CoverForBook.SOFT,
+        "inventory": 4,
+        "daily_fee": "22.00",
+    }
+    defaults.update(**params)
+    return Book.objects.create(**defaults)
+
+
+class FullScanPatternTest(SimpleTestCase):
+    def test_plan_formats(self):
+        for step in (
+            "SCAN borrowings_borrowing",
+            "SCAN TABLE borrowings_borrowing",
+            "SCAN TABLE borrowings_borrowing AS U0",
+            "SCAN borrowings_borrowing USING INDEX borrowing_updated_at_idx",
+            "SCAN TABLE borrowings_borrowing USING COVERING INDEX borrowing_idx",
+        ):
+            self.assertEqual(FULL_SCAN.match(step)["table"], "borrowings_borrowing")
+
+        for step in (
+            "SEARCH borrowings_borrowing USING INDEX borrowing_user_active_idx "
+            "(user_id=?)",
+            "SEARCH TABLE library_book USING INTEGER PRIMARY KEY (rowid=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ):
+            self.assertIsNone(FULL_SCAN.match(step))
+
+
+class BorrowingQueryPlanTest(QueryPlanAssertionsMixin, TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin.test@test.com", "testpass", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.book = sample_book()
+        self.borrowing = Borrowing.objects.create(user=self.user, book=self.book)
+
+    def test_user_list(self):
+        self.client.force_authenticate(self.user)
+
+        with self.assertNoFullTableScans():
+            self.client.get(BORROWING_URL)
+            self.client.get(BORROWING_URL, {"is_active": "true"})
+
+    def test_staff_list_filters(self):
+        self.client.force_authenticate(self.admin)
+        today = str(datetime.date.today())
+
+        with self.assertNoFullTableScans():
+            self.client.get(BORROWING_URL, {"user_id": self.user.id})
+            self.client.get(
+                BORROWING_URL, {"user_id": self.user.id, "is_active": "true"}
+            )
+
+        # A bare date range is served newest-first straight off the primary
+        # key: SQLite prefers walking ids in page order and stopping at the
+        # LIMIT over sorting every row the borrow_date index matches.
+        with self.assertNoFullTableScans(allow_scans=["borrowings_borrowing"]):
+            self.client.get(BORROWING_URL, {"borrow_date__gte": today})
+
+    def test_staff_list_pages(self):
+        self.client.force_authenticate(self.admin)
+        Borrowing.objects.create(user=self.user, book=self.book)
+
+        # The first unfiltered page walks the table backwards from the
+        # newest row and stops after one page; later pages seek by cursor.
+        with self.assertNoFullTableScans(allow_scans=["borrowings_borrowing"]):
+            response = self.client.get(BORROWING_URL, {"page_size": 1})
+        with self.assertNoFullTableScans():
+            self.client.get(response.data["next"])
+
+    def test_retrieve_and_return(self):
+        self.client.force_authenticate(self.user)
+
+        with self.assertNoFullTableScans():
+            self.client.get(
+                reverse("borrowing:borrowing-detail", args=[self.borrowing.id])
+            )
+            self.client.get(
+                reverse(
+                    "borrowing:borrowing-return-borrowing", args=[self.borrowing.id]
+                )
+            )
+
+    def test_checkout(self):
+        self.client.force_authenticate(self.user)
+
+        with self.assertNoFullTableScans():
+            self.client.post(BORROWING_URL, {"book": self.book.id})
+            self.client.post(
+                reverse("borrowing:borrowing-bulk-checkout"),
+                {"items": [{"book": self.book.id}]},
+                format="json",
+            )
+            self.client.post(
+                reverse("borrowing:borrowing-bulk-return"),
+                {"borrowings": [self.borrowing.id]},
+                format="json",
+            )
+
+    def test_overdue_scan(self):
+        with self.assertNoFullTableScans():
+            list(
+                Borrowing.objects.filter(
+                    is_active=True, expected_return_date__lt=datetime.date.today()
+                )
+            )
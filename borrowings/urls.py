@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from borrowings import async_views
 from borrowings.views import BorrowingView
 
 app_name = "borrowing"
@@ -8,4 +9,11 @@ app_name = "borrowing"
 router = routers.DefaultRouter()
 router.register("borrowings", BorrowingView, basename="borrowing")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path(
+        "async/borrowings/",
+        async_views.borrowing_list,
+        name="async-borrowing-list",
+    ),
+]
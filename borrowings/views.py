@@ -1,8 +1,12 @@
-from datetime import datetime
+from collections import Counter
+from datetime import date, datetime
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.utils import timezone
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, status
 from rest_framework.decorators import action
@@ -10,30 +14,63 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.permissions import IsAuthenticated
 
+from borrowings.export import EXPORT_FORMATS
+from borrowings.metrics import checkouts
 from borrowings.models import Borrowing
 from borrowings.serializers import (
+    BORROWING_LIST_COLUMNS,
+    BORROWING_LIST_VALUES,
     BorrowingSerializer,
     BorrowingListSerializer,
     BorrowingDetailSerializer,
+    BorrowingBulkCreateSerializer,
+    BorrowingBulkItemSerializer,
+    BorrowingBulkReturnSerializer,
+    borrowing_list_representation,
 )
-from library.models import Book
+from library.models import Book, BookStats
+from library.serializers import BookSerializer
+from library_service.conditional import (
+    conditional_response,
+    row_validators,
+    set_validators,
+)
+from library_service.fieldsets import SPARSE_FIELDSET_PARAMETERS, SparseFieldsetMixin
+from library_service.pagination import NewestFirstCursorPagination
 
 
 class BorrowingView(
+    SparseFieldsetMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
 ):
+    queryset = Borrowing.objects.select_related("book")
     serializer_class = BorrowingSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["is_active", "user_id"]
+    filterset_fields = {
+        "is_active": ["exact"],
+        "user_id": ["exact"],
+        "borrow_date": ["gte", "lte"],
+    }
+    pagination_class = NewestFirstCursorPagination
+    query_budget = {
+        "list": 2,
+        "retrieve": 3,
+        "create": 7,
+        "return_borrowing": 9,
+        "bulk_checkout": 9,
+        "bulk_return": 9,
+    }
+    throttle_scope = {"create": "checkout", "bulk_checkout": "checkout"}
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Borrowing.objects.all().select_related("book")
-        return Borrowing.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -42,8 +79,24 @@ class BorrowingView(
         if self.action == "retrieve":
             return BorrowingDetailSerializer
 
+        if self.action == "bulk_checkout":
+            return BorrowingBulkCreateSerializer
+
+        if self.action == "bulk_return":
+            return BorrowingBulkReturnSerializer
+
         return BorrowingSerializer
 
+    @extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = row_validators(
+            self.get_queryset(), kwargs["pk"], "updated_at", "book__updated_at"
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -56,60 +109,201 @@ class BorrowingView(
         actual_return_date = request.data.get("actual_return_date")
 
         if expected_return_date < str(datetime.today().date()):
+            checkouts.inc("invalid")
             return Response(
                 {"error": "Expected return date cannot be in the past"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         with transaction.atomic():
-            try:
-                book = Book.objects.get(pk=book_id)
-            except Book.DoesNotExist:
+            if not get_user_model().objects.take_loan(
+                user.pk, settings.MAX_ACTIVE_LOANS
+            ):
+                checkouts.inc("loan_limit")
                 return Response(
-                    {"error": "Book not found"}, status=status.HTTP_404_NOT_FOUND
+                    {"error": "Loan limit reached"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if book.inventory == 0:
+            if not Book.objects.take_copy(book_id):
+                book_exists = Book.objects.filter(pk=book_id).exists()
+                # Nothing was borrowed: undo the loan counted above.
+                transaction.set_rollback(True)
+                if not book_exists:
+                    checkouts.inc("not_found")
+                    return Response(
+                        {"error": "Book not found"}, status=status.HTTP_404_NOT_FOUND
+                    )
+
+                checkouts.inc("out_of_stock")
                 return Response(
                     {"error": "Book is out of stock"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            book.inventory -= 1
-            book.save()
-
             borrowing = Borrowing.objects.create(
-                book=book,
+                book_id=book_id,
                 user=user,
                 expected_return_date=expected_return_date,
                 actual_return_date=actual_return_date,
             )
+            BookStats.objects.record_checkouts({book_id: 1}, borrowing.borrow_date)
+
+        checkouts.inc("created")
+        serializer = self.get_serializer(borrowing)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk_checkout(self, request):
+        """Borrow several books in one transaction, reporting on every item."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        valid_items = []
+        for item in serializer.validated_data["items"]:
+            item_serializer = BorrowingBulkItemSerializer(data=item)
+            if item_serializer.is_valid():
+                results.append(None)
+                valid_items.append((len(results) - 1, item_serializer.validated_data))
+            else:
+                checkouts.inc("invalid")
+                results.append(
+                    {"book": item.get("book"), "errors": item_serializer.errors}
+                )
+
+        with transaction.atomic():
+            loans = get_user_model().objects.take_loans(
+                request.user.pk, len(valid_items), settings.MAX_ACTIVE_LOANS
+            )
+            for index, item in valid_items[loans:]:
+                checkouts.inc("loan_limit")
+                results[index] = {"book": item["book"], "error": "Loan limit reached"}
+            valid_items = valid_items[:loans]
+
+            taken = Book.objects.take_copies(
+                Counter(item["book"] for _, item in valid_items)
+            )
+
+            borrowings = []
+            for index, item in valid_items:
+                book_id = item["book"]
+                if book_id not in taken:
+                    checkouts.inc("not_found")
+                    results[index] = {"book": book_id, "error": "Book not found"}
+                elif not taken[book_id]:
+                    checkouts.inc("out_of_stock")
+                    results[index] = {"book": book_id, "error": "Book is out of stock"}
+                else:
+                    taken[book_id] -= 1
+                    borrowings.append(
+                        (
+                            index,
+                            Borrowing(
+                                book_id=book_id,
+                                user=request.user,
+                                expected_return_date=item.get(
+                                    "expected_return_date", date.today()
+                                ),
+                            ),
+                        )
+                    )
+
+            Borrowing.objects.bulk_create(borrowing for _, borrowing in borrowings)
+            BookStats.objects.record_checkouts(
+                Counter(borrowing.book_id for _, borrowing in borrowings), date.today()
+            )
+            if loans > len(borrowings):
+                get_user_model().objects.return_loans(
+                    {request.user.pk: loans - len(borrowings)}, {}
+                )
 
-            serializer = self.get_serializer(borrowing)
+        checkouts.inc("created", amount=len(borrowings))
+        for index, borrowing in borrowings:
+            results[index] = {
+                "book": borrowing.book_id,
+                "borrowing": BorrowingSerializer(borrowing).data,
+            }
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED
+            if borrowings
+            else status.HTTP_400_BAD_REQUEST,
+        )
 
     @action(methods=["GET"], detail=True, url_path="return")
     def return_borrowing(self, request, pk=None):
         """Mark a borrowing as returned and update the book's inventory."""
         borrowing = self.get_object()
 
-        if borrowing.actual_return_date:
+        with transaction.atomic():
+            returned = Borrowing.objects.filter(pk=borrowing.pk).close()
+
+        if not returned:
             return Response(
                 {"message": "This borrowing has already been returned."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        borrowing.actual_return_date = timezone.now()
-        borrowing.is_active = False
-        borrowing.save()
+        return Response(
+            {"message": "Borrowing returned successfully."}, status=status.HTTP_200_OK
+        )
+
+    @action(methods=["POST"], detail=False, url_path="bulk/return")
+    def bulk_return(self, request):
+        """Return many borrowings at once and restore their books' inventory."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pks = set(serializer.validated_data["borrowings"])
 
-        book = borrowing.book
-        book.inventory += 1
-        book.save()
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=pks)
+            found = set(queryset.values_list("pk", flat=True))
+            returned = queryset.close()
 
         return Response(
-            {"message": "Borrowing returned successfully."}, status=status.HTTP_200_OK
+            {
+                "returned": sorted(returned),
+                "already_returned": sorted(found.difference(returned)),
+                "not_found": sorted(pks.difference(found)),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "borrow_date__gte",
+                type=OpenApiTypes.DATE,
+                description="Borrowed on or after (ex. ?borrow_date__gte=2023-01-01)",
+            ),
+            OpenApiParameter(
+                "borrow_date__lte",
+                type=OpenApiTypes.DATE,
+                description="Borrowed on or before (ex. ?borrow_date__lte=2023-12-31)",
+            ),
+        ],
+        responses={(200, "application/x-ndjson"): str, (200, "text/csv"): str},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=r"export/(?P<export_format>ndjson|csv)",
+    )
+    def export(self, request, export_format):
+        """Stream every borrowing matching the list filters as NDJSON or CSV."""
+        iter_rows, content_type = EXPORT_FORMATS[export_format]
+        queryset = self.filter_queryset(self.get_queryset()).order_by("id")
+        return StreamingHttpResponse(
+            iter_rows(queryset),
+            content_type=content_type,
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="borrowings.{export_format}"'
+                )
+            },
         )
 
     @extend_schema(
@@ -124,5 +318,20 @@ class BorrowingView(
             ),
         ]
     )
+    @extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS)
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer()
+        if isinstance(serializer.fields.get("book"), BookSerializer):
+            return super().list(request, *args, **kwargs)
+
+        fields = None
+        columns = BORROWING_LIST_VALUES
+        if "fields" in request.query_params:
+            fields = list(serializer.fields)
+            # The cursor is read off the rows, so the ordering column is
+            # loaded whether or not it is shown.
+            columns = {self.pagination_class.ordering.lstrip("-")}
+            columns.update(BORROWING_LIST_COLUMNS[name] for name in fields)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*columns))
+        return self.get_paginated_response(borrowing_list_representation(page, fields))
@@ -0,0 +1,47 @@
+from django.http import JsonResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from library.models import Book
+from library.serializers import BookSerializer
+from library_service.async_views import async_api_view
+from library_service.conditional import (
+    conditional_response,
+    make_etag,
+    set_validators,
+)
+from library_service.pagination import IdCursorPagination
+
+
+@async_api_view()
+async def book_list(request):
+    """Async ``GET /books/``: the id-ordered pages, without search or ordering."""
+    books, links = await IdCursorPagination().apaginate(request, Book.objects.all())
+    etag = make_etag(
+        request.get_full_path(),
+        links["next"] is not None,
+        links["previous"] is not None,
+        *((book.id, book.updated_at) for book in books),
+    )
+    response = conditional_response(request, etag)
+    if response is None:
+        serializer = BookSerializer(
+            books, many=True, context={"request": Request(request)}
+        )
+        response = JsonResponse({**links, "results": serializer.data})
+    return set_validators(response, etag)
+
+
+@async_api_view()
+async def book_detail(request, pk):
+    try:
+        book = await Book.objects.aget(pk=pk)
+    except Book.DoesNotExist:
+        raise NotFound()
+
+    etag, last_modified = make_etag(pk, book.updated_at), book.updated_at
+    response = conditional_response(request, etag, last_modified)
+    if response is None:
+        serializer = BookSerializer(book, context={"request": Request(request)})
+        response = JsonResponse(serializer.data)
+    return set_validators(response, etag, last_modified)
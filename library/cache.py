@@ -0,0 +1,72 @@
+"""Versioned read-through cache for the book catalog.
+
+List pages are cached under the catalog version and detail payloads under
+the book's own version. Writes never delete cached payloads; they bump the
+versions instead, so every later read builds a new key and the old entries
+simply age out of the cache.
+
+The versions live in the ``default`` cache, so with several server processes
+it has to be shared (``DJANGO_CACHE_BACKEND``): with a per-process cache, a
+write only bumps the versions of the process that made it, and the others
+serve their cached inventory until ``BOOK_CACHE_TIMEOUT``.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "library:catalog:version"
+
+
+def _book_version_key(pk):
+    return f"library:book:{pk}:version"
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1, so a version key that was
+        # evicted never comes back at a value that old payloads still use.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never read, so nothing has been cached under it yet.
+            pass
+
+
+def invalidate_books(pks):
+    """Bump the catalog version and the versions of the given books.
+
+    The versions are bumped right away and again once the surrounding
+    transaction commits: a reader racing the transaction may cache the
+    pre-commit rows under the first bump, but never under the second.
+    """
+    keys = [CATALOG_VERSION_KEY, *(_book_version_key(pk) for pk in pks)]
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def cached_book_list(request, build, part="data"):
+    """Return ``part`` of the list page for ``request``, building it on a miss.
+
+    Pages are cached per absolute URL: their ``next`` and ``previous`` links
+    carry the scheme and host they were requested with.
+    """
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    key = f"library:books:{_version(CATALOG_VERSION_KEY)}:{url}:{part}"
+    return cache.get_or_set(key, build, settings.BOOK_CACHE_TIMEOUT)
+
+
+def cached_book_detail(pk, build, part="data"):
+    """Return ``part`` of the detail of book ``pk``, building it on a miss."""
+    key = f"library:book:{pk}:{_version(_book_version_key(pk))}:{part}"
+    return cache.get_or_set(key, build, settings.BOOK_CACHE_TIMEOUT)
@@ -0,0 +1,94 @@
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
+
+
+def fts_query(terms):
+    """FTS5 query matching every term as a prefix, e.g. ``"harr"* "pot"*``."""
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+class BookSearchFilter(BaseFilterBackend):
+    """``?search=`` over book titles and authors.
+
+    On SQLite the terms are prefix-matched against the FTS5 index and the
+    results are ranked by bm25, best first. Other databases fall back to a
+    case-insensitive substring match in the default order.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "").split()
+        if not terms:
+            return queryset
+
+        if connections[queryset.db].vendor != "sqlite":
+            condition = Q()
+            for term in terms:
+                condition &= Q(title__icontains=term) | Q(author__icontains=term)
+            return queryset.filter(condition)
+
+        return queryset.filter(search_index__document__match=fts_query(terms)).annotate(
+            search_rank=F("search_index__rank")
+        )
+
+    def get_ordering(self, request, queryset, view):
+        """Cursor pagination ordering: by rank for ranked search results."""
+        if "search_rank" in queryset.query.annotations:
+            return ("search_rank", "id")
+        return (view.pagination_class.ordering,)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Search titles and authors by word prefixes "
+                "(ex. ?search=harr pot)",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+class BookOrderingFilter(BaseFilterBackend):
+    """``?ordering=popularity``: most borrowed books first.
+
+    The ranking comes from the precomputed ``BookStats`` counters, never from
+    the loan history. Without a known ordering the search backend's ordering
+    applies, so this backend must come first in ``filter_backends``: cursor
+    pagination takes its ordering from the first backend that provides one.
+    """
+
+    ordering_param = "ordering"
+    # Ties are broken on the stats row's book id, not the book's own, so
+    # the whole ordering is served by the popularity index without a sort.
+    # Both are annotations so the cursor can read them off each row.
+    orderings = {"popularity": ("-popularity", "popularity_book")}
+
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get(self.ordering_param) != "popularity":
+            return queryset
+        # Every book has a stats row, so the inner join loses nothing and
+        # lets the database read books straight off the popularity index.
+        return queryset.filter(stats__isnull=False).annotate(
+            popularity=F("stats__total_borrows"), popularity_book=F("stats__book")
+        )
+
+    def get_ordering(self, request, queryset, view):
+        if "popularity" in queryset.query.annotations:
+            return self.orderings["popularity"]
+        return BookSearchFilter().get_ordering(request, queryset, view)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.ordering_param,
+                "required": False,
+                "in": "query",
+                "description": "Order by popularity, most borrowed first "
+                "(ex. ?ordering=popularity)",
+                "schema": {"type": "string", "enum": list(self.orderings)},
+            }
+        ]
@@ -0,0 +1,96 @@
+"""Upsert catalog records into ``Book`` a batch at a time.
+
+Each batch is validated row by row with ``BookImportSerializer`` and written
+with a single ``INSERT ... ON CONFLICT (title) DO UPDATE``. Invalid rows are
+reported and skipped; they never abort the rest of their batch.
+
+A row's ``inventory`` only stocks a new book. ``Book.inventory`` is the
+copies on the shelf, which checkouts and returns move, so a catalog count
+written over it would be off by the copies out on loan.
+"""
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from library.cache import invalidate_books
+from library.models import Book, BookStats
+from library.serializers import BookImportSerializer
+
+UPDATE_FIELDS = ["author", "cover", "daily_fee", "updated_at"]
+
+BatchResult = namedtuple("BatchResult", "created updated errors")
+
+
+def _messages(errors):
+    """Serializer errors as plain strings, ready for JSON or a terminal."""
+    if isinstance(errors, dict):
+        return {field: _messages(error) for field, error in errors.items()}
+    if isinstance(errors, list):
+        return [_messages(error) for error in errors]
+    return str(errors)
+
+
+def _upsert(rows):
+    Book.objects.bulk_create(
+        [Book(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=["title"],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def upsert_books(records):
+    """Validate and upsert a batch of ``library_service.importing`` records.
+
+    Returns a :class:`BatchResult` whose ``errors`` are ``(line, messages)``
+    pairs. When a title appears twice in the batch the later row wins.
+    """
+    errors = []
+    rows = {}
+    # One serializer validates every row: building its fields costs far more
+    # than validating a row with them.
+    serializer = BookImportSerializer()
+    for record in records:
+        if record.error:
+            errors.append((record.line, {"non_field_errors": [record.error]}))
+            continue
+        try:
+            row = serializer.run_validation(record.data)
+        except ValidationError as error:
+            errors.append((record.line, _messages(as_serializer_error(error))))
+            continue
+        rows[row["title"]] = (record.line, row)
+
+    existing = set(Book.objects.filter(title__in=rows).values_list("title", flat=True))
+    try:
+        with transaction.atomic():
+            _upsert(row for _, row in rows.values())
+    except IntegrityError:
+        # A row clashes with another book's author: upsert the batch row by
+        # row to find out which, keeping all the others.
+        for title, (line, row) in list(rows.items()):
+            try:
+                with transaction.atomic():
+                    _upsert([row])
+            except IntegrityError:
+                errors.append(
+                    (line, {"author": ["book with this author already exists."]})
+                )
+                del rows[title]
+
+    written = dict(Book.objects.filter(title__in=rows).values_list("title", "pk"))
+    BookStats.objects.bulk_create(
+        [
+            BookStats(book_id=pk)
+            for title, pk in written.items()
+            if title not in existing
+        ],
+        ignore_conflicts=True,
+    )
+    invalidate_books(written.values())
+
+    errors.sort(key=lambda error: error[0])
+    updated = len(existing.intersection(written))
+    return BatchResult(len(written) - updated, updated, errors)
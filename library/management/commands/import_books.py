@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importing import upsert_books
+from library_service.importing import (
+    FORMATS,
+    batched,
+    detect_format,
+    open_source,
+    read_records,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update books from a CSV or JSON Lines catalog (title, author, "
+        "cover, inventory, daily_fee), matching existing books by title. "
+        "The inventory of existing books is left as it is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for standard input.")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            format = detect_format(options["path"], options["format"])
+        except ValueError as error:
+            raise CommandError(error)
+
+        rows = created = updated = invalid = 0
+        started = time.perf_counter()
+        with open_source(options["path"]) as stream:
+            records = read_records(stream, format)
+            for batch in batched(records, options["batch_size"]):
+                result = upsert_books(batch)
+                for line, messages in result.errors:
+                    self.stderr.write(f"Line {line}: {messages}")
+
+                rows += len(batch)
+                created += result.created
+                updated += result.updated
+                invalid += len(result.errors)
+                self.stdout.write(
+                    f"{rows} rows: {created} created, {updated} updated, "
+                    f"{invalid} invalid "
+                    f"({rows / (time.perf_counter() - started):.0f} rows/s)"
+                )
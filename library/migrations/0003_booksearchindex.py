@@ -0,0 +1,91 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import library.models
+
+CREATE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(
+        title,
+        author,
+        content='library_book',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update
+    AFTER UPDATE OF title, author ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO library_book_fts (rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    "INSERT INTO library_book_fts (library_book_fts) VALUES ('rebuild')",
+]
+
+DROP_INDEX = [
+    "DROP TRIGGER IF EXISTS library_book_fts_update",
+    "DROP TRIGGER IF EXISTS library_book_fts_delete",
+    "DROP TRIGGER IF EXISTS library_book_fts_insert",
+    "DROP TABLE IF EXISTS library_book_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "sqlite":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0002_book_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookSearchIndex",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="library.book",
+                    ),
+                ),
+                (
+                    "document",
+                    library.models.FullTextField(db_column="library_book_fts"),
+                ),
+                ("title", models.TextField()),
+                ("author", models.TextField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "library_book_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(run_on_sqlite(CREATE_INDEX), run_on_sqlite(DROP_INDEX)),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+from borrowings.functions import DaysBetween
+
+
+def backfill_book_stats(apps, schema_editor):
+    Book = apps.get_model("library", "Book")
+    BookStats = apps.get_model("library", "BookStats")
+    Borrowing = apps.get_model("borrowings", "Borrowing")
+
+    returned = Q(actual_return_date__isnull=False)
+    history = {
+        row.pop("book"): row
+        for row in Borrowing.objects.order_by()
+        .values("book")
+        .annotate(
+            total_borrows=Count("pk"),
+            currently_out=Count("pk", filter=~returned),
+            total_returns=Count("pk", filter=returned),
+            total_loan_days=Coalesce(
+                Sum(DaysBetween("actual_return_date", "borrow_date"), filter=returned),
+                0,
+            ),
+            last_borrowed=Max("borrow_date"),
+        )
+    }
+    BookStats.objects.bulk_create(
+        (
+            BookStats(book_id=pk, **history.get(pk, {}))
+            for pk in Book.objects.values_list("pk", flat=True)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0003_booksearchindex"),
+        ("borrowings", "0004_fines"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookStats",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="library.book",
+                    ),
+                ),
+                ("total_borrows", models.PositiveIntegerField(default=0)),
+                ("currently_out", models.PositiveIntegerField(default=0)),
+                ("total_returns", models.PositiveIntegerField(default=0)),
+                ("total_loan_days", models.PositiveBigIntegerField(default=0)),
+                ("last_borrowed", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "book stats",
+                "indexes": [
+                    models.Index(
+                        fields=["-total_borrows", "book"],
+                        name="bookstats_popularity_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_book_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,68 @@
 from django.db import models
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from library.cache import invalidate_books
+
+
+class BookManager(models.Manager):
+    def take_copy(self, pk):
+        """Take one copy of the book off the shelf if any are left in stock.
+
+        The stock check and the decrement are a single conditional UPDATE,
+        so concurrent checkouts can never drive the inventory below zero.
+        Returns True if a copy was taken.
+        """
+        taken = self.filter(pk=pk, inventory__gt=0).update(
+            inventory=F("inventory") - 1, updated_at=timezone.now()
+        )
+        if taken:
+            invalidate_books([pk])
+        return bool(taken)
+
+    def take_copies(self, wanted):
+        """Take up to ``wanted[pk]`` copies of each book with a single UPDATE.
+
+        Must run inside a transaction: the rows are locked while the copies
+        are allocated. Returns ``{pk: copies taken}`` for every book that
+        exists, so missing books are simply absent from the result.
+        """
+        stock = dict(
+            self.select_for_update()
+            .filter(pk__in=wanted)
+            .values_list("pk", "inventory")
+        )
+        taken = {pk: min(wanted[pk], inventory) for pk, inventory in stock.items()}
+        decremented = [pk for pk, count in taken.items() if count]
+        if decremented:
+            self.filter(pk__in=decremented).update(
+                inventory=Case(
+                    *[
+                        When(pk=pk, then=F("inventory") - taken[pk])
+                        for pk in decremented
+                    ]
+                ),
+                updated_at=timezone.now(),
+            )
+            invalidate_books(decremented)
+        return taken
+
+    def return_copies(self, returned):
+        """Put ``returned[pk]`` copies of each book back with a single UPDATE."""
+        if returned:
+            self.filter(pk__in=returned).update(
+                inventory=Case(
+                    *[
+                        When(pk=pk, then=F("inventory") + count)
+                        for pk, count in returned.items()
+                    ]
+                ),
+                updated_at=timezone.now(),
+            )
+            invalidate_books(returned)
+
 
 class Book(models.Model):
     class CoverForBook(models.TextChoices):
@@ -12,6 +74,131 @@ class Book(models.Model):
     cover = models.CharField(max_length=4, choices=CoverForBook.choices)
     inventory = models.PositiveIntegerField(default=1)
     daily_fee = models.DecimalField(max_digits=5, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookManager()
 
     def __str__(self):
         return f"Title: {self.title} | Inventory: {self.inventory}"
+
+
+class BookStatsManager(models.Manager):
+    def record_checkouts(self, borrowed, day):
+        """Count ``borrowed[pk]`` new loans of each book with a single UPDATE."""
+        if borrowed:
+            self.filter(pk__in=borrowed).update(
+                total_borrows=Case(
+                    *[
+                        When(pk=pk, then=F("total_borrows") + count)
+                        for pk, count in borrowed.items()
+                    ]
+                ),
+                currently_out=Case(
+                    *[
+                        When(pk=pk, then=F("currently_out") + count)
+                        for pk, count in borrowed.items()
+                    ]
+                ),
+                last_borrowed=day,
+            )
+
+    def record_returns(self, returned):
+        """Count returned loans, ``returned[pk] = (loans, total days out)``."""
+        if returned:
+            self.filter(pk__in=returned).update(
+                currently_out=Case(
+                    *[
+                        When(
+                            pk=pk,
+                            then=Greatest(
+                                F("currently_out") - count,
+                                0,
+                                output_field=models.PositiveIntegerField(),
+                            ),
+                        )
+                        for pk, (count, _) in returned.items()
+                    ]
+                ),
+                total_returns=Case(
+                    *[
+                        When(pk=pk, then=F("total_returns") + count)
+                        for pk, (count, _) in returned.items()
+                    ]
+                ),
+                total_loan_days=Case(
+                    *[
+                        When(pk=pk, then=F("total_loan_days") + days)
+                        for pk, (_, days) in returned.items()
+                    ]
+                ),
+            )
+
+
+class BookStats(models.Model):
+    """Circulation counters of a book, kept current by checkouts and returns."""
+
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    total_borrows = models.PositiveIntegerField(default=0)
+    currently_out = models.PositiveIntegerField(default=0)
+    total_returns = models.PositiveIntegerField(default=0)
+    total_loan_days = models.PositiveBigIntegerField(default=0)
+    last_borrowed = models.DateField(null=True, blank=True)
+
+    objects = BookStatsManager()
+
+    class Meta:
+        verbose_name_plural = "book stats"
+        indexes = [
+            models.Index(
+                fields=["-total_borrows", "book"], name="bookstats_popularity_idx"
+            ),
+        ]
+
+    @property
+    def average_loan_days(self):
+        if not self.total_returns:
+            return None
+        return self.total_loan_days / self.total_returns
+
+    def __str__(self):
+        return f"{self.book_id} | {self.total_borrows} borrows"
+
+
+class FullTextField(models.TextField):
+    """The FTS5 column named after its table, which matches on every column."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class BookSearchIndex(models.Model):
+    """SQLite FTS5 index over book titles and authors.
+
+    An external-content table over ``library_book``, kept in sync by the
+    triggers created in its migration; it only exists on SQLite.
+    """
+
+    book = models.OneToOneField(
+        Book,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+    )
+    document = FullTextField(db_column="library_book_fts")
+    title = models.TextField()
+    author = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "library_book_fts"
@@ -1,9 +1,19 @@
 from rest_framework import serializers
 
 from library.models import Book
+from library_service.fieldsets import SparseFieldsetSerializerMixin
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ("id", "title", "author", "cover", "inventory", "daily_fee")
+
+
+class BookImportSerializer(serializers.ModelSerializer):
+    """One catalog import row. Titles may already exist: imports upsert them."""
+
+    class Meta:
+        model = Book
+        fields = ("title", "author", "cover", "inventory", "daily_fee")
+        extra_kwargs = {"title": {"validators": []}, "author": {"validators": []}}
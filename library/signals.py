@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from library.cache import invalidate_books
+from library.models import Book, BookStats
+
+
+@receiver(post_save, sender=Book)
+def create_book_stats(sender, instance, created, **kwargs):
+    if created:
+        BookStats.objects.get_or_create(book=instance)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    invalidate_books([instance.pk])
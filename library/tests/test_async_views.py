@@ -0,0 +1,102 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from library.tests.test_book_api import BOOK_URL, detail_url, sample_book
+
+ASYNC_BOOK_URL = reverse("library:async-book-list")
+
+
+def async_detail_url(book_id):
+    return reverse("library:async-book-detail", args=[book_id])
+
+
+class AsyncBookApiTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, path, **kwargs):
+        return self.request("get", path, **kwargs)
+
+    def request(self, method, path, **kwargs):
+        async def send():
+            return await getattr(self.async_client, method)(path, **kwargs)
+
+        return async_to_sync(send)()
+
+    def test_book_list_matches_sync_list(self):
+        for number in range(5):
+            sample_book(title=f"Title {number}", author=f"Author {number}")
+
+        url = ASYNC_BOOK_URL + "?page_size=2"
+        while url:
+            sync = self.client.get(url.replace(ASYNC_BOOK_URL, BOOK_URL)).json()
+            response = self.get(url)
+            page = response.json()
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(page["results"], sync["results"])
+            for link in ("next", "previous"):
+                self.assertEqual(
+                    page[link] and page[link].replace(ASYNC_BOOK_URL, BOOK_URL),
+                    sync[link],
+                )
+            url = page["next"]
+
+    def test_book_list_previous_page(self):
+        books = [
+            sample_book(title=f"Title {number}", author=f"Author {number}")
+            for number in range(5)
+        ]
+        page = self.get(ASYNC_BOOK_URL + "?page_size=2").json()
+        page = self.get(self.get(page["next"]).json()["next"]).json()
+
+        previous = self.get(page["previous"]).json()
+
+        self.assertEqual(
+            [row["id"] for row in previous["results"]], [books[2].id, books[3].id]
+        )
+        self.assertIsNotNone(previous["previous"])
+        self.assertIsNotNone(previous["next"])
+
+    def test_book_list_not_modified(self):
+        sample_book()
+        etag = self.get(ASYNC_BOOK_URL)["ETag"]
+
+        response = self.get(ASYNC_BOOK_URL, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_book_detail_matches_sync_detail(self):
+        book = sample_book()
+        sync = self.client.get(detail_url(book.id))
+
+        response = self.get(async_detail_url(book.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(response["ETag"], sync["ETag"])
+        self.assertEqual(response["Last-Modified"], sync["Last-Modified"])
+
+    def test_book_detail_not_modified(self):
+        book = sample_book()
+        etag = self.get(async_detail_url(book.id))["ETag"]
+
+        response = self.get(async_detail_url(book.id), headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_book_detail_not_found(self):
+        response = self.get(async_detail_url(1))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Not found."})
+
+    def test_write_methods_not_allowed(self):
+        response = self.request("post", ASYNC_BOOK_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
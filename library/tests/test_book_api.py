@@ -1,11 +1,15 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from library.models import Book
+from library.models import Book, BookStats
 from library.serializers import BookSerializer
+from library_service.testing import QueryBudgetAssertionsMixin
 
 BOOK_URL = reverse("library:book-list")
 
@@ -28,6 +32,7 @@ def detail_url(book_id):
 
 class UnauthenticatedBookApiTest(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
 
     def test_show_book_list_for_unauth_user(self):
@@ -41,9 +46,183 @@ class UnauthenticatedBookApiTest(TestCase):
         response = self.client.get(url)
         self.assertEquals(response.status_code, status.HTTP_200_OK)
 
+    def test_book_list_served_from_cache(self):
+        sample_book()
+        self.client.get(BOOK_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(BOOK_URL)
+
+        self.assertEquals(len(response.data["results"]), 1)
+
+    def test_book_list_cached_per_scheme_and_host(self):
+        sample_book()
+        sample_book(title="Other", author="Other Author")
+        self.client.get(BOOK_URL, {"page_size": 1})
+
+        response = self.client.get(BOOK_URL, {"page_size": 1}, secure=True)
+        self.assertTrue(response.data["next"].startswith("https://testserver/"))
+
+        with self.settings(ALLOWED_HOSTS=["internal"]):
+            response = self.client.get(BOOK_URL, {"page_size": 1}, HTTP_HOST="internal")
+        self.assertTrue(response.data["next"].startswith("http://internal/"))
+
+    def test_book_detail_cache_invalidated_on_inventory_change(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        self.client.get(url)
+
+        Book.objects.take_copy(book.id)
+        response = self.client.get(url)
+
+        self.assertEquals(response.data["inventory"], 3)
+
+        with transaction.atomic():
+            Book.objects.take_copies({book.id: 2})
+        response = self.client.get(url)
+
+        self.assertEquals(response.data["inventory"], 1)
+
+        Book.objects.return_copies({book.id: 2})
+        response = self.client.get(url)
+        list_response = self.client.get(BOOK_URL)
+
+        self.assertEquals(response.data["inventory"], 3)
+        self.assertEquals(list_response.data["results"][0]["inventory"], 3)
+
+    def test_book_detail_conditional_get(self):
+        book = sample_book()
+        url = detail_url(book.id)
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEquals(response["ETag"], etag)
+
+        Book.objects.take_copy(book.id)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertNotEquals(response["ETag"], etag)
+
+    def test_book_list_conditional_get(self):
+        book = sample_book()
+
+        etag = self.client.get(BOOK_URL)["ETag"]
+        response = self.client.get(BOOK_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Book.objects.take_copy(book.id)
+
+        response = self.client.get(BOOK_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+
+    def test_search_books(self):
+        dune = sample_book(title="Dune", author="Frank Herbert")
+        messiah = sample_book(title="Dune Messiah", author="Herbert F.")
+        sample_book(title="Solaris", author="Stanislaw Lem")
+
+        response = self.client.get(BOOK_URL, {"search": "herb dun"})
+        self.assertEquals(
+            {book["id"] for book in response.data["results"]}, {dune.id, messiah.id}
+        )
+
+        response = self.client.get(BOOK_URL, {"search": "messiah"})
+        self.assertEquals(
+            [book["id"] for book in response.data["results"]], [messiah.id]
+        )
+
+    def test_search_index_follows_book_changes(self):
+        book = sample_book(title="Dune", author="Frank Herbert")
+
+        book.title = "Solaris"
+        book.save()
+        self.assertEquals(
+            self.client.get(BOOK_URL, {"search": "dune"}).data["results"], []
+        )
+        self.assertEquals(
+            len(self.client.get(BOOK_URL, {"search": "sol"}).data["results"]), 1
+        )
+
+        book.delete()
+        self.assertEquals(
+            self.client.get(BOOK_URL, {"search": "sol"}).data["results"], []
+        )
+
+    def test_search_results_paginated_by_rank(self):
+        for i in range(3):
+            sample_book(title=f"Dune {i}", author=f"Author{i}")
+        sample_book(title="Dune Dune", author="Frank Herbert")
 
-class AuthenticatedBookApiTest(TestCase):
+        response = self.client.get(BOOK_URL, {"search": "dune", "page_size": 2})
+        first_page = [book["title"] for book in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        second_page = [book["title"] for book in response.data["results"]]
+
+        self.assertEquals(first_page[0], "Dune Dune")
+        self.assertEquals(len(set(first_page + second_page)), 4)
+
+    def test_books_ordered_by_popularity(self):
+        books = [sample_book(title=f"Book {i}", author=f"Author{i}") for i in range(4)]
+        for book, borrows in zip(books, [1, 3, 0, 3]):
+            BookStats.objects.filter(book=book).update(total_borrows=borrows)
+
+        response = self.client.get(BOOK_URL, {"ordering": "popularity", "page_size": 3})
+        first_page = [book["id"] for book in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        second_page = [book["id"] for book in response.data["results"]]
+
+        self.assertEquals(
+            first_page + second_page,
+            [books[1].id, books[3].id, books[0].id, books[2].id],
+        )
+
+    def test_popularity_ties_paged_by_key(self):
+        books = [sample_book(title=f"Book {i}", author=f"Author{i}") for i in range(7)]
+        for book, borrows in zip(books, [2, 5, 2, 2, 5, 2, 0]):
+            BookStats.objects.filter(book=book).update(total_borrows=borrows)
+        expected = [books[i].id for i in (1, 4, 0, 2, 3, 5, 6)]
+
+        pages = []
+        response = self.client.get(BOOK_URL, {"ordering": "popularity", "page_size": 2})
+        pages.append([book["id"] for book in response.data["results"]])
+        while response.data["next"]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data["next"])
+            pages.append([book["id"] for book in response.data["results"]])
+            for query in queries:
+                self.assertNotIn("OFFSET", query["sql"])
+
+        self.assertEquals(sum(pages, []), expected)
+        for start in (4, 2, 0):
+            response = self.client.get(response.data["previous"])
+            self.assertEquals(
+                [book["id"] for book in response.data["results"]],
+                expected[start : start + 2],
+            )
+        self.assertIsNone(response.data["previous"])
+
+    def test_popular_search_results(self):
+        dune = sample_book(title="Dune", author="Frank Herbert")
+        messiah = sample_book(title="Dune Messiah", author="Frank Herbert Jr")
+        sample_book(title="Emma", author="Jane Austen")
+        BookStats.objects.filter(book=messiah).update(total_borrows=5)
+
+        response = self.client.get(
+            BOOK_URL, {"ordering": "popularity", "search": "dune"}
+        )
+
+        self.assertEquals(
+            [book["id"] for book in response.data["results"]], [messiah.id, dune.id]
+        )
+
+
+class AuthenticatedBookApiTest(QueryBudgetAssertionsMixin, TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "testUser@test.com", "testpass"
@@ -55,11 +234,30 @@ class AuthenticatedBookApiTest(TestCase):
         sample_book()
 
         response = self.client.get(BOOK_URL)
-        books = Book.objects.all()
+        books = Book.objects.order_by("id")
         serializer = BookSerializer(books, many=True)
 
         self.assertEquals(response.status_code, status.HTTP_200_OK)
-        self.assertEquals(response.data, serializer.data)
+        self.assertWithinQueryBudget(response)
+        self.assertEquals(response.data["results"], serializer.data)
+
+    def test_list_book_paginated_by_cursor(self):
+        books = [sample_book(title=f"Title{i}", author=f"Author{i}") for i in range(5)]
+
+        response = self.client.get(BOOK_URL, {"page_size": 2})
+        self.assertEquals(
+            [book["id"] for book in response.data["results"]],
+            [books[0].id, books[1].id],
+        )
+
+        sample_book(title="Title5", author="Author5")
+        books[0].delete()
+
+        response = self.client.get(response.data["next"])
+        self.assertEquals(
+            [book["id"] for book in response.data["results"]],
+            [books[2].id, books[3].id],
+        )
 
     def test_book_retrieve(self):
         book = sample_book(title="BookTest1")
@@ -70,8 +268,36 @@ class AuthenticatedBookApiTest(TestCase):
         serializer = BookSerializer(book)
 
         self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
         self.assertEquals(response.data, serializer.data)
 
+    def test_list_book_sparse_fields(self):
+        sample_book()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(BOOK_URL, {"fields": "id,title"})
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(list(response.data["results"][0]), ["id", "title"])
+        page_query = queries.captured_queries[-1]["sql"]
+        self.assertIn('"title"', page_query)
+        self.assertNotIn('"daily_fee"', page_query)
+
+    def test_book_retrieve_sparse_fields(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        self.client.get(url)
+
+        response = self.client.get(url, {"fields": "author"})
+
+        self.assertEquals(response.data, {"author": book.author})
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get(BOOK_URL, {"fields": "id,isbn"})
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
     def test_create_book_forbidden(self):
         payload = {
             "title": "Testtitle",
@@ -88,6 +314,7 @@ class AuthenticatedBookApiTest(TestCase):
 
 class AdminBookApiTest(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "testAdmin@test.com",
@@ -158,3 +385,52 @@ class AdminBookApiTest(TestCase):
         response = self.client.delete(url)
 
         self.assertEquals(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_update_book_if_match(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.patch(url, {"inventory": 7}, HTTP_IF_MATCH=etag)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertNotEquals(response["ETag"], etag)
+
+        response = self.client.patch(url, {"inventory": 1}, HTTP_IF_MATCH=etag)
+        book.refresh_from_db()
+
+        self.assertEquals(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEquals(book.inventory, 7)
+
+    def test_update_missing_book_if_match(self):
+        url = detail_url(999)
+
+        for headers in ({}, {"HTTP_IF_MATCH": '"abc"'}):
+            response = self.client.put(
+                url,
+                {
+                    "title": "Missing",
+                    "author": "Nobody",
+                    "cover": Book.CoverForBook.SOFT,
+                    "inventory": 1,
+                    "daily_fee": "1.00",
+                },
+                **headers,
+            )
+
+            self.assertEquals(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_book_invalidates_cache(self):
+        book = sample_book()
+        url = detail_url(book.id)
+        self.client.get(url)
+        self.client.get(BOOK_URL)
+
+        self.client.patch(url, {"inventory": 9})
+
+        self.assertEquals(self.client.get(url).data["inventory"], 9)
+        self.assertEquals(self.client.get(BOOK_URL).data["results"][0]["inventory"], 9)
+
+        self.client.delete(url)
+
+        self.assertEquals(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEquals(self.client.get(BOOK_URL).data["results"], [])
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from library.models import Book, BookStats
+
+BOOK_URL = reverse("library:book-list")
+BULK_URL = reverse("library:book-bulk-upsert")
+
+CATALOG = (
+    "title,author,cover,inventory,daily_fee\n"
+    "Dune,Frank Herbert,Hard,3,1.50\n"
+    "Emma,Jane Austen,Soft,2,0.75\n"
+    "Ulysses,James Joyce,Paper,1,1.00\n"
+    "Persuasion,Jane Austen,Soft,1,0.50\n"
+    "Dune,Frank Herbert,Soft,7,2.00\n"
+)
+
+
+class ImportBooksCommandTest(TestCase):
+    def setUp(self) -> None:
+        Book.objects.create(
+            title="Emma", author="Someone", cover="Hard", inventory=1, daily_fee="9"
+        )
+
+    def test_import_csv(self):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as file:
+            file.write(CATALOG)
+        self.addCleanup(os.remove, path)
+        out, err = StringIO(), StringIO()
+
+        call_command("import_books", path, stdout=out, stderr=err)
+
+        self.assertIn("5 rows: 1 created, 1 updated, 2 invalid", out.getvalue())
+        self.assertIn("Line 4: {'cover':", err.getvalue())
+        self.assertIn("Line 5: {'author':", err.getvalue())
+
+        dune = Book.objects.get(title="Dune")
+        self.assertEqual(
+            (dune.cover, dune.inventory, dune.daily_fee), ("Soft", 7, Decimal("2.00"))
+        )
+        self.assertTrue(BookStats.objects.filter(book=dune).exists())
+        emma = Book.objects.get(title="Emma")
+        self.assertEqual((emma.author, emma.inventory), ("Jane Austen", 1))
+        self.assertFalse(Book.objects.filter(title="Persuasion").exists())
+
+
+class BookBulkUpsertApiTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin.test@test.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_upsert_csv(self):
+        self.client.get(BOOK_URL)
+
+        response = self.client.post(BULK_URL, CATALOG, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {key: response.data[key] for key in ("rows", "created", "updated")},
+            {"rows": 5, "created": 2, "updated": 0},
+        )
+        self.assertEqual([error["line"] for error in response.data["errors"]], [4, 5])
+        self.assertEqual(len(self.client.get(BOOK_URL).data["results"]), 2)
+
+    def test_bulk_upsert_jsonl(self):
+        body = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "title": "Dune",
+                        "author": "Frank Herbert",
+                        "cover": "Hard",
+                        "inventory": 3,
+                        "daily_fee": "1.50",
+                    }
+                ),
+                "not json",
+            ]
+        )
+
+        response = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["error_count"], 1)
+        self.assertTrue(Book.objects.filter(title="Dune").exists())
+
+    def test_reimport_keeps_copies_on_loan(self):
+        self.client.post(BULK_URL, CATALOG, content_type="text/csv")
+        caches["throttle"].clear()
+        dune = Book.objects.get(title="Dune")
+        borrowing = self.client.post(
+            reverse("borrowing:borrowing-list"), {"book": dune.id}
+        ).data["id"]
+
+        response = self.client.post(
+            BULK_URL,
+            "title,author,cover,inventory,daily_fee\n"
+            "Dune,Frank Herbert,Hard,7,3.00\n",
+            content_type="text/csv",
+        )
+
+        self.assertEqual(response.data["updated"], 1)
+        dune.refresh_from_db()
+        self.assertEqual((dune.inventory, dune.daily_fee), (6, Decimal("3.00")))
+
+        self.client.get(
+            reverse("borrowing:borrowing-return-borrowing", args=[borrowing])
+        )
+        dune.refresh_from_db()
+        self.assertEqual(dune.inventory, 7)
+
+    def test_bulk_upsert_admin_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user.test@test.com", "testpass")
+        )
+
+        response = self.client.post(BULK_URL, CATALOG, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Book.objects.exists())
@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework import routers
 
+from library import async_views
 from library.views import BookViewSet
 
 app_name = "library"
@@ -7,4 +9,7 @@ app_name = "library"
 router = routers.DefaultRouter()
 router.register("books", BookViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/books/", async_views.book_list, name="async-book-list"),
+    path("async/books/<int:pk>/", async_views.book_detail, name="async-book-detail"),
+]
@@ -1,15 +1,136 @@
+from django.db import transaction
+from django.http import Http404
+from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
 
+from library.cache import cached_book_detail, cached_book_list
+from library.filters import BookOrderingFilter, BookSearchFilter
+from library.importing import upsert_books
 from library.models import Book
-from library.serializers import BookSerializer
+from library.serializers import BookImportSerializer, BookSerializer
+from library_service.importing import batched
+from library_service.parsers import CSVRecordParser, JSONLinesRecordParser
+from library_service.conditional import (
+    conditional_response,
+    page_etag,
+    row_validators,
+    set_validators,
+)
+from library_service.fieldsets import SPARSE_FIELDSET_PARAMETERS, SparseFieldsetMixin
+from library_service.pagination import IdCursorPagination
 
 
-class BookViewSet(viewsets.ModelViewSet):
+BULK_IMPORT_BATCH_SIZE = 1000
+BULK_IMPORT_MAX_ERRORS = 1000
+
+
+class BookViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    pagination_class = IdCursorPagination
+    filter_backends = [BookOrderingFilter, BookSearchFilter]
+    query_budget = {"list": 3, "retrieve": 3}
 
     def get_permissions(self):
         if self.request.method in ["POST", "PUT", "PATCH", "DELETE"]:
             return [IsAdminUser()]
         return [AllowAny()]
+
+    @extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        build = super().list
+        etag = cached_book_list(
+            request,
+            lambda: page_etag(
+                self, request, self.filter_queryset(self.get_queryset()), "updated_at"
+            ),
+            part="etag",
+        )
+        response = conditional_response(request, etag)
+        if response is None:
+            response = Response(
+                cached_book_list(request, lambda: build(request, *args, **kwargs).data)
+            )
+        return set_validators(response, etag)
+
+    @extend_schema(parameters=SPARSE_FIELDSET_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        build = super().retrieve
+        try:
+            pk = int(kwargs["pk"])
+        except ValueError:
+            return build(request, *args, **kwargs)
+
+        etag, last_modified = cached_book_detail(
+            pk,
+            lambda: row_validators(self.get_queryset(), pk, "updated_at"),
+            part="validators",
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = Response(
+                cached_book_detail(
+                    pk,
+                    lambda: build(request, *args, **kwargs).data,
+                    part=f"data:{request.query_params.get('fields')}",
+                )
+            )
+        return set_validators(response, etag, last_modified)
+
+    def update(self, request, *args, **kwargs):
+        """Update a book, honouring If-Match / If-Unmodified-Since."""
+        queryset = self.get_queryset()
+        with transaction.atomic():
+            etag, last_modified = row_validators(
+                queryset.select_for_update(), kwargs["pk"], "updated_at"
+            )
+            if etag is None:
+                # No such book: a 404, whatever the preconditions say.
+                raise Http404
+            response = conditional_response(request, etag, last_modified)
+            if response is not None:
+                return set_validators(response, etag, last_modified)
+
+            response = super().update(request, *args, **kwargs)
+
+        return set_validators(
+            response, *row_validators(queryset, kwargs["pk"], "updated_at")
+        )
+
+    @extend_schema(
+        request={
+            "text/csv": BookImportSerializer,
+            "application/x-ndjson": BookImportSerializer,
+        },
+        responses={200: dict},
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk",
+        parser_classes=[CSVRecordParser, JSONLinesRecordParser],
+    )
+    def bulk_upsert(self, request):
+        """Create or update books from a CSV or JSON Lines upload, by title.
+
+        Rows are upserted in batches as the body is read. Invalid rows are
+        reported by line number and skipped without failing their batch.
+        """
+        totals = {"rows": 0, "created": 0, "updated": 0, "error_count": 0}
+        errors = []
+        for batch in batched(request.data, BULK_IMPORT_BATCH_SIZE):
+            result = upsert_books(batch)
+            totals["rows"] += len(batch)
+            totals["created"] += result.created
+            totals["updated"] += result.updated
+            totals["error_count"] += len(result.errors)
+            errors.extend(
+                {"line": line, "errors": messages}
+                for line, messages in result.errors[
+                    : BULK_IMPORT_MAX_ERRORS - len(errors)
+                ]
+            )
+        return Response({**totals, "errors": errors})
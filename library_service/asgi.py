@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_service.settings')
 
 application = get_asgi_application()
+
+# Build the OpenAPI schema now rather than on the first request for it.
+from library_service.schema import schema_documents  # noqa: E402
+
+schema_documents()
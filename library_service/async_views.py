@@ -0,0 +1,55 @@
+"""Plumbing for the native async (ASGI) read endpoints.
+
+DRF 3.14 views are synchronous; under ASGI each one occupies a thread of
+the sync executor for its whole run. The async endpoints are plain Django
+``async def`` views that answer with ``JsonResponse``: they read through
+the async ORM and only fall back to ``sync_to_async`` for the rare queries
+authentication needs (see ``aauthenticate``).
+"""
+import functools
+
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework import exceptions
+
+from library_service.authentication import aauthenticate
+
+
+def async_api_view(methods=("GET",), authenticated=False):
+    """Turn an ``async def`` view into a small JSON API view.
+
+    Rejects other methods with 405, sets ``request.user`` (and answers 401
+    without one) when ``authenticated``, and renders the ``APIException``
+    the view raises the way DRF's exception handler does.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            try:
+                if authenticated:
+                    auth = await aauthenticate(request)
+                    if auth is None:
+                        raise exceptions.NotAuthenticated()
+                    request.user, request.auth = auth
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as error:
+                return exception_response(error)
+
+        return wrapper
+
+    return decorator
+
+
+def exception_response(error):
+    detail = error.detail
+    if not isinstance(detail, (list, dict)):
+        detail = {"detail": detail}
+    response = JsonResponse(detail, status=error.status_code, safe=False)
+    if isinstance(
+        error, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+    ):
+        response.status_code = 401
+        response["WWW-Authenticate"] = 'Bearer realm="api"'
+    return response
@@ -0,0 +1,140 @@
+"""JWT authentication that remembers recently seen users.
+
+``JWTAuthentication`` loads the user row on every authenticated request.
+``CachedJWTAuthentication`` keeps the users it loaded in a small
+per-process LRU cache for ``AUTH_USER_CACHE_TIMEOUT`` seconds, so a burst
+of requests with the same token costs one query. Saving or deleting a user
+(see ``user.signals``), or updating them through a queryset (see
+``user.models.UserQuerySet.update``), drops their entry; other processes
+pick the change up when their entry expires, so ``AUTH_USER_CACHE_TIMEOUT``
+bounds how long they may still accept a deactivated user. Revoked tokens
+are rejected before any user is looked up (see ``user.revocation``).
+
+``CachedJWTAuthenticationScheme`` documents it in the OpenAPI schema as the
+bearer scheme of simplejwt; drf-spectacular registers it on import.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from user.revocation import revoked_tokens
+
+
+class UserCache:
+    """A thread-safe LRU of users that also expires entries after ``timeout``."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        with self._lock:
+            entry = self._users.get(pk)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._users[pk]
+                return None
+            self._users.move_to_end(pk)
+            return user
+
+    def set(self, pk, user):
+        with self._lock:
+            self._users[pk] = (user, time.monotonic() + self.timeout)
+            self._users.move_to_end(pk)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, pk):
+        with self._lock:
+            self._users.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    max_size=settings.AUTH_USER_CACHE_SIZE, timeout=settings.AUTH_USER_CACHE_TIMEOUT
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        """Validate the token and reject it if it has been revoked."""
+        token = super().get_validated_token(raw_token)
+        if revoked_tokens.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_cached_user(self, validated_token):
+        """Return a copy of the token's cached user, or ``None`` on a miss.
+
+        Never queries. Every request gets its own copy of the cached user, so
+        nothing a view does to ``request.user`` leaks into other requests.
+        """
+        user = user_cache.get(str(validated_token.get(api_settings.USER_ID_CLAIM)))
+        if user is None:
+            return None
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return copy.copy(user)
+
+    def get_user(self, validated_token):
+        """Return the token's user, from the cache when it was seen recently."""
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(str(validated_token.get(api_settings.USER_ID_CLAIM)), user)
+            user = copy.copy(user)
+        return user
+
+
+class CachedJWTAuthenticationScheme(SimpleJWTScheme):
+    target_class = "library_service.authentication.CachedJWTAuthentication"
+
+
+async def aauthenticate(request):
+    """``CachedJWTAuthentication().authenticate(request)`` for async views.
+
+    Returns ``(user, token)``, or ``None`` if the request has no bearer
+    token. Token validation runs inline; the queries a request may need (a
+    user cache miss, a due revocation refresh, a possibly revoked token) run
+    through ``sync_to_async``, so a warm process answers without any.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    token = JWTAuthentication.get_validated_token(authentication, raw_token)
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not revoked_tokens.rules_out(jti) and await sync_to_async(
+        revoked_tokens.is_revoked
+    )(jti):
+        raise InvalidToken(_("Token has been revoked"))
+
+    user = authentication.get_cached_user(token)
+    if user is None:
+        user = await sync_to_async(authentication.get_user)(token)
+    return user, token
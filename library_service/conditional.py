@@ -0,0 +1,69 @@
+"""Conditional request helpers (ETag / Last-Modified) for the API views.
+
+Validators are computed from the rows' ``updated_at`` timestamps, so a view
+can answer ``304 Not Modified`` or ``412 Precondition Failed`` after one
+small query and without serializing anything.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag over the string form of ``parts``."""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def page_etag(view, request, queryset, *fields):
+    """ETag of the list page ``request`` asks for, from ``fields`` of its rows.
+
+    Runs the view's paginator over ``queryset.values("id", *fields)``: the
+    same keyset query as the real page, so inserts, deletes and updates that
+    touch the page all change the tag.
+    """
+    paginator = view.pagination_class()
+    rows = paginator.paginate_queryset(
+        queryset.values("id", *queryset.query.annotations, *fields),
+        request,
+        view=view,
+    )
+    return make_etag(
+        request.get_full_path(),
+        paginator.has_next,
+        paginator.has_previous,
+        *(tuple(row.values()) for row in rows),
+    )
+
+
+def row_validators(queryset, pk, *fields):
+    """ETag and Last-Modified of row ``pk`` from its timestamp ``fields``.
+
+    Returns ``(None, None)`` if the row does not exist (or ``pk`` is not a
+    valid key), leaving the 404 to the view itself.
+    """
+    try:
+        timestamps = queryset.filter(pk=pk).values_list(*fields).first()
+    except (TypeError, ValueError):
+        timestamps = None
+    if timestamps is None:
+        return None, None
+    return make_etag(pk, *timestamps), max(timestamps)
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """Return a 304/412 response if the request preconditions say so."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
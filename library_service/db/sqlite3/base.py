@@ -0,0 +1,115 @@
+"""SQLite backend that tunes every new connection for a web server.
+
+Use ``"ENGINE": "library_service.db.sqlite3"``. On connect it sets:
+
+* ``journal_mode=WAL``: readers no longer block on a writer (and the other
+  way round); only writers still queue behind each other.
+* ``synchronous=NORMAL``: with WAL, commits skip the fsync and stay durable
+  across application crashes; a power loss can lose the last commits, but
+  never corrupts the database.
+* ``busy_timeout``: a connection that finds the database locked waits for
+  up to this many milliseconds instead of failing at once.
+* ``mmap_size``: reads go through memory-mapped I/O rather than read()
+  calls into a private page cache.
+
+``OPTIONS["pragmas"]`` overrides or extends these defaults.
+
+Transactions (``atomic`` blocks) start with a plain deferred ``BEGIN``,
+which takes no lock until the first write, so read-only transactions never
+wait for a writer. Two opt-ins are for processes whose transactions nearly
+all write:
+
+* ``OPTIONS["transaction_mode"] = "IMMEDIATE"`` takes the write lock at
+  ``BEGIN``, as the option of that name does from Django 5.1 on. A deferred
+  transaction that reads and then writes has to upgrade its lock
+  mid-transaction, which fails at once if another writer got in first.
+* ``OPTIONS["write_lock"] = True`` makes the threads of a process queue for
+  a per-database lock before they ``BEGIN``, held until the transaction
+  ends. SQLite admits one writer at a time and a blocked writer polls for
+  the lock with sleeps of up to 100ms, which makes for long tail latencies
+  when many threads write; the queue hands the lock over at once instead.
+  It also holds up read-only transactions of the same process, and writers
+  in other processes still meet at the SQLite lock.
+"""
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+
+
+def _write_lock(name):
+    with _write_locks_lock:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict["OPTIONS"]
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.get("pragmas", {})}
+        self.transaction_mode = options.get("transaction_mode")
+        self._write_lock = None
+        if options.get("write_lock") and not self.is_in_memory_db():
+            self._write_lock = _write_lock(self.settings_dict["NAME"])
+        self._holds_write_lock = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pragmas", None)
+        params.pop("transaction_mode", None)
+        params.pop("write_lock", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self._write_lock is not None:
+            timeout = int(self.pragmas["busy_timeout"]) / 1000
+            if not self._write_lock.acquire(timeout=timeout):
+                raise OperationalError("database is locked")
+            self._holds_write_lock = True
+        try:
+            if self.transaction_mode is None:
+                super()._start_transaction_under_autocommit()
+            else:
+                self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self._write_lock.release()
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_write_lock()
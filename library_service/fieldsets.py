@@ -0,0 +1,150 @@
+"""Sparse fieldsets (``?fields=``) and expansion (``?expand=``) for the API.
+
+``?fields=id,title`` limits a response to the listed fields, and
+``?fields=id,book.title`` the fields of an expanded relation as well.
+``?expand=book`` nests the related object in full rather than its key (or
+whatever the serializer shows by default); an empty ``?expand=`` collapses
+the relations a serializer expands by default.
+
+The serializer drops the fields that were not asked for before anything is
+serialized, and the view loads only the columns the remaining fields read.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma-separated fields to return, "
+        "`relation.field` for the fields of an expanded relation.",
+    ),
+    OpenApiParameter(
+        "expand",
+        OpenApiTypes.STR,
+        description="Comma-separated relations to nest in full.",
+    ),
+]
+
+
+def _names(value):
+    return [name for name in (part.strip() for part in value.split(",")) if name]
+
+
+def parse_fields(request):
+    """``?fields=`` as ``{field: None or {subfield: None}}``, or ``None``."""
+    value = request.query_params.get("fields")
+    if value is None:
+        return None
+    fields = {}
+    for name in _names(value):
+        name, _, subfield = name.partition(".")
+        if not subfield:
+            fields[name] = None
+        elif fields.get(name, {}) is not None:
+            fields.setdefault(name, {})[subfield] = None
+    return fields
+
+
+def parse_expand(request):
+    """``?expand=`` as a list of relations, or ``None`` if absent."""
+    value = request.query_params.get("expand")
+    return None if value is None else _names(value)
+
+
+class SparseFieldsetSerializerMixin:
+    """``fields`` and ``expand`` arguments for a ``ModelSerializer``.
+
+    ``expandable_fields`` maps the relations that can be expanded to their
+    serializer classes, and ``expand=None`` expands ``default_expand``.
+    Unknown names are a validation error.
+    """
+
+    expandable_fields = {}
+    default_expand = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.default_expand if expand is None else expand
+
+        unknown = [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError(
+                {"expand": [f"Cannot expand {name!r}." for name in unknown]}
+            )
+        for name in expand:
+            if fields is None or name in fields:
+                self.fields[name] = self.expandable_fields[name](
+                    read_only=True, fields=fields and fields[name]
+                )
+
+        if fields is not None:
+            unknown = [name for name in fields if name not in self.fields]
+            unknown += [
+                f"{name}.{subfield}"
+                for name, subfields in fields.items()
+                if subfields and name not in expand
+                for subfield in subfields
+            ]
+            if unknown:
+                raise serializers.ValidationError(
+                    {"fields": [f"Unknown field {name!r}." for name in unknown]}
+                )
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+
+
+def serialized_columns(serializer, prefix=""):
+    """The model field paths and relations ``serializer`` reads.
+
+    Returns ``(columns, relations)`` for ``only()`` and ``select_related()``.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    opts = serializer.Meta.model._meta
+    columns, relations = [], []
+    for field in serializer.fields.values():
+        try:
+            opts.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        path = prefix + field.source
+        columns.append(path)
+        if isinstance(field, serializers.BaseSerializer):
+            relations.append(path)
+            nested_columns, nested_relations = serialized_columns(field, path + "__")
+            columns += nested_columns
+            relations += nested_relations
+        elif isinstance(field, serializers.SlugRelatedField):
+            relations.append(path)
+            columns.append(f"{path}__{field.slug_field}")
+    return columns, relations
+
+
+class SparseFieldsetMixin:
+    """Sparse fieldsets for the ``sparse_actions`` of a generic view.
+
+    Their serializers get the ``?fields=`` and ``?expand=`` of the request,
+    and their querysets load only the columns those serializers read.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            kwargs.setdefault("fields", parse_fields(self.request))
+            kwargs.setdefault("expand", parse_expand(self.request))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.sparse_actions:
+            columns, relations = serialized_columns(self.get_serializer())
+            # An empty select_related() would follow every foreign key.
+            queryset = queryset.select_related(None)
+            if relations:
+                queryset = queryset.select_related(*relations)
+            queryset = queryset.only(*columns)
+        return queryset
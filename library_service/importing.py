@@ -0,0 +1,66 @@
+"""Streaming readers for the bulk import commands.
+
+Rows are read one at a time from CSV (with a header row) or JSON Lines, so
+an import never holds the whole file in memory.
+"""
+import contextlib
+import csv
+import itertools
+import json
+import sys
+from collections import namedtuple
+
+FORMATS = ("csv", "jsonl")
+
+Record = namedtuple("Record", "line data error")
+
+
+def detect_format(path, format=None):
+    """The explicit ``format``, else the one implied by the file extension."""
+    if format:
+        return format
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path}; pass --format.")
+
+
+def open_source(path):
+    """Open ``path`` for reading text, ``-`` meaning standard input."""
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, newline="", encoding="utf-8")
+
+
+def read_records(stream, format):
+    """Yield a :class:`Record` per row of ``stream``.
+
+    ``data`` is the row as a dict, or None with ``error`` set when the row
+    cannot be parsed. ``line`` is the row's line number, for error reports.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for data in reader:
+            yield Record(reader.line_num, data, None)
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as error:
+            yield Record(line, None, f"Invalid JSON: {error}")
+            continue
+        if not isinstance(data, dict):
+            yield Record(line, None, "Expected a JSON object")
+            continue
+        yield Record(line, data, None)
+
+
+def batched(iterable, size):
+    """Split ``iterable`` into lists of at most ``size`` items."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
@@ -0,0 +1,182 @@
+"""In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in ``registry`` and are updated under
+a lock per metric, so an update costs a dict lookup and a few additions.
+``GET /metrics`` renders them all, for staff and the scrapers in
+``METRICS_ALLOWED_IPS``. Every process keeps its own values: with
+several workers, scrape each one (or sum them in the query).
+
+Label values are passed positionally, in the order of the metric's
+``labelnames``::
+
+    checkouts.inc("created")
+    REQUEST_DURATION.observe(0.012, "BookViewSet", "list")
+"""
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._values[()] = self._new()
+
+    def _new(self):
+        return 0
+
+    def _samples(self, labels, value):
+        yield self.name, _format_labels(self.labelnames, labels), value
+
+    def render(self):
+        with self._lock:
+            values = [
+                (labels, self._copy(value)) for labels, value in self._values.items()
+            ]
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labels, value in sorted(values, key=lambda item: item[0]):
+            lines += [
+                f"{name}{label_text} {_format_value(sample)}"
+                for name, label_text, sample in self._samples(labels, value)
+            ]
+        return "\n".join(lines)
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = self._new()
+            state[0][index] += 1
+            state[1] += value
+
+    def _new(self):
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+    def _samples(self, labels, value):
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self._bounds, counts):
+            cumulative += count
+            yield (
+                f"{self.name}_bucket",
+                _format_labels(self.labelnames, labels, f'le="{bound}"'),
+                cumulative,
+            )
+        label_text = _format_labels(self.labelnames, labels)
+        yield f"{self.name}_sum", label_text, total
+        yield f"{self.name}_count", label_text, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "library_http_request_duration_seconds",
+    "Time to build the response, by view and action.",
+    ["view", "action"],
+)
+REQUESTS = registry.counter(
+    "library_http_requests_total",
+    "Responses sent, by view, action and status code.",
+    ["view", "action", "status"],
+)
+REQUEST_QUERIES = registry.counter(
+    "library_http_request_queries_total",
+    "Database queries run by requests, by view and action.",
+    ["view", "action"],
+)
+REQUEST_DB_SECONDS = registry.counter(
+    "library_http_request_db_seconds_total",
+    "Time spent in database queries by requests, by view and action.",
+    ["view", "action"],
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "library_http_requests_in_flight", "Requests being handled right now."
+)
@@ -0,0 +1,209 @@
+"""Per-request query accounting and metrics.
+
+``QueryStatsMiddleware`` counts the queries a request runs and the time
+they take, and spots N+1 patterns: the same query shape (the SQL with its
+parameters left out and ``IN`` lists collapsed) run again and again. A
+request that goes over its view's ``query_budget`` (or ``QUERY_BUDGET``) or
+repeats a shape more than ``QUERY_REPEAT_LIMIT`` times is logged as a
+warning on the ``library_service.queries`` logger. With
+``QUERY_STATS_HEADERS`` on, every response also gets ``X-Query-Count`` and
+a ``Server-Timing`` entry for the database.
+
+Views declare their budget as ``query_budget``: a number, or a dict by
+viewset action. The queries a streaming response runs while it is sent
+(the borrowing exports) happen after the middleware and are not counted.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from library_service import metrics
+
+logger = logging.getLogger("library_service.queries")
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+# Each thread's connections, looked up once: ``connections[alias]`` goes
+# through an asgiref ``Local``, which is slow enough to show per request.
+_thread = threading.local()
+
+
+def thread_connections():
+    try:
+        return _thread.connections
+    except AttributeError:
+        _thread.connections = connections.all()
+        return _thread.connections
+
+
+class QueryStats:
+    """An ``execute_wrapper`` that tallies the queries run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if "IN (" in sql:
+                sql = IN_LIST.sub("IN (...)", sql)
+            self.shapes[sql] += 1
+
+    def start(self):
+        """Start recording the queries of this thread's connections."""
+        self.connections = thread_connections()
+        for connection in self.connections:
+            connection.execute_wrappers.append(self)
+
+    def stop(self):
+        for connection in self.connections:
+            connection.execute_wrappers.remove(self)
+
+    def repeated(self, limit):
+        """The shapes run more than ``limit`` times, most frequent first."""
+        if self.count <= limit:
+            return []
+        return [
+            (sql, count) for sql, count in self.shapes.most_common() if count > limit
+        ]
+
+
+def resolved_view(request):
+    """``(view, action)`` of the view that served ``request``.
+
+    ``view`` is the view class, or the function of a function view; the
+    action is the viewset action or else the lowercase method. Both are
+    ``None`` if no URL matched.
+    """
+    match = request.resolver_match
+    if match is None:
+        return None, None
+    actions = getattr(match.func, "actions", None) or {}
+    method = request.method.lower()
+    return getattr(match.func, "cls", match.func), actions.get(method, method)
+
+
+def query_budget(request):
+    """The query budget of the view that served ``request``."""
+    view, action = resolved_view(request)
+    budget = getattr(view, "query_budget", None)
+    if isinstance(budget, dict):
+        budget = budget.get(action)
+    return settings.QUERY_BUDGET if budget is None else budget
+
+
+class MetricsMiddleware:
+    """Record request latency, status and query totals in ``metrics``.
+
+    Goes before ``QueryStatsMiddleware`` so it can read the query stats of
+    each response.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, duration):
+        view, action = resolved_view(request)
+        labels = ("unmatched", "") if view is None else (view.__name__, action)
+        metrics.REQUEST_DURATION.observe(duration, *labels)
+        metrics.REQUESTS.inc(*labels, response.status_code)
+        stats = getattr(response, "query_stats", None)
+        if stats is not None:
+            metrics.REQUEST_QUERIES.inc(*labels, amount=stats.count)
+            metrics.REQUEST_DB_SECONDS.inc(*labels, amount=stats.duration)
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = QueryStats()
+        stats.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats.stop()
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        # Connections belong to threads: wrap the ones of the thread that
+        # runs this request's queries, not the event loop's.
+        stats = QueryStats()
+        await sync_to_async(stats.start)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stats.stop)()
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        budget = query_budget(request)
+        repeated = stats.repeated(settings.QUERY_REPEAT_LIMIT)
+        response.query_stats = stats
+        response.query_budget = budget
+
+        if stats.count > budget or repeated:
+            logger.warning(
+                "%s %s ran %d queries (budget %d) in %.1fms%s",
+                request.method,
+                request.path,
+                stats.count,
+                budget,
+                stats.duration * 1000,
+                "".join(f"\n  {count}x {sql}" for sql, count in repeated),
+            )
+        if settings.QUERY_STATS_HEADERS:
+            response["X-Query-Count"] = stats.count
+            response[
+                "Server-Timing"
+            ] = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+        return response
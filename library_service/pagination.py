@@ -0,0 +1,157 @@
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.request import Request
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination on the primary key.
+
+    Each page is a ``WHERE id > <cursor> ORDER BY id LIMIT n`` index range
+    scan, so deep pages cost the same as the first one and cursors stay
+    valid while new rows are inserted.
+
+    Orderings of several fields (popularity, search rank), whose leading
+    field has ties, are paged on all of them: the cursor holds the values of
+    every ordering field of the last row, so runs of ties are paged by key
+    rather than by DRF's offset into the run.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(request, queryset, view)
+        self.keyset = len(ordering) > 1
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = ordering
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None and self.cursor.position is not None:
+            try:
+                values = json.loads(self.cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(keyset_after(ordering, values, reverse))
+        if reverse:
+            ordering = [_invert(field) for field in ordering]
+        rows = list(queryset.order_by(*ordering)[: self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = (
+                self.cursor is not None and self.cursor.position is not None
+            )
+        return self.page
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not (self.page and self.has_next):
+            return None
+        position = self._keyset_position(self.page[-1])
+        return self.encode_cursor(Cursor(0, False, position))
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not (self.page and self.has_previous):
+            return None
+        position = self._keyset_position(self.page[0])
+        return self.encode_cursor(Cursor(0, True, position))
+
+    def _keyset_position(self, row):
+        values = [
+            row[name] if isinstance(row, dict) else getattr(row, name)
+            for name in (field.lstrip("-") for field in self.ordering)
+        ]
+        return json.dumps(values, default=str)
+
+    async def apaginate(self, request, queryset):
+        """Fetch the page ``request`` asks for from an async view.
+
+        Returns ``(rows, links)``, ``links`` holding the ``next`` and
+        ``previous`` URLs, with the same cursors and page boundaries as
+        ``paginate_queryset``. Ids are unique, so unlike the general
+        ``CursorPagination`` no cursor needs an offset.
+        """
+        request = Request(request)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.base_url = request.build_absolute_uri()
+
+        field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        reverse = cursor is not None and cursor.reverse
+        if cursor is not None and cursor.position is not None:
+            lookup = "lt" if descending != reverse else "gt"
+            queryset = queryset.filter(**{f"{field}__{lookup}": cursor.position})
+        ordering = field if descending == reverse else f"-{field}"
+        rows = [row async for row in queryset.order_by(ordering)[: page_size + 1]]
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next = has_more
+            has_previous = cursor is not None and cursor.position is not None
+
+        links = OrderedDict(next=None, previous=None)
+        if rows and has_next:
+            position = self._position(rows[-1], field)
+            links["next"] = self.encode_cursor(Cursor(0, False, position))
+        if rows and has_previous:
+            position = self._position(rows[0], field)
+            links["previous"] = self.encode_cursor(Cursor(0, True, position))
+        return rows, links
+
+    @staticmethod
+    def _position(row, field):
+        return str(row[field] if isinstance(row, dict) else getattr(row, field))
+
+
+def _invert(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def keyset_after(ordering, values, reverse=False):
+    """The rows after ``values`` of the ``ordering`` fields (before, if
+    ``reverse``), as a ``Q``.
+
+    The leading field gets a plain range condition too, so the database can
+    start from the position in its index instead of filtering every row.
+    """
+    names = [field.lstrip("-") for field in ordering]
+    lookups = ["lt" if field.startswith("-") != reverse else "gt" for field in ordering]
+    after = Q()
+    for i, (name, lookup) in enumerate(zip(names, lookups)):
+        ties = dict(zip(names[:i], values))
+        after |= Q(**ties, **{f"{name}__{lookup}": values[i]})
+    return Q(**{f"{names[0]}__{lookups[0]}e": values[0]}) & after
+
+
+class NewestFirstCursorPagination(IdCursorPagination):
+    """Keyset pagination on the primary key, most recent rows first."""
+
+    ordering = "-id"
@@ -0,0 +1,32 @@
+"""Parsers that hand a request body to the view as a stream of records.
+
+``request.data`` becomes a lazy iterator of ``library_service.importing``
+records, so a view can process an upload batch by batch while it is still
+being read instead of holding the whole body in memory.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+from library_service.importing import read_records
+
+
+class RecordStreamParser(BaseParser):
+    format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if stream is None:
+            return iter(())
+        return read_records(codecs.getreader(encoding)(stream), self.format)
+
+
+class CSVRecordParser(RecordStreamParser):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class JSONLinesRecordParser(RecordStreamParser):
+    media_type = "application/x-ndjson"
+    format = "jsonl"
@@ -0,0 +1,81 @@
+"""The OpenAPI schema, built once per process and served from memory.
+
+Generating the schema introspects every view, which takes long enough to
+matter when the docs are crawled. ``schema_documents`` renders it once, as
+YAML and as JSON, each with its ETag and a gzipped copy, and
+``library_service.views.schema`` serves those bytes as they are. The
+``wsgi.py`` and ``asgi.py`` entry points (and so ``runserver``) build it at
+startup, so no request waits for it; elsewhere, tests included, it is built
+on first use.
+
+With ``OPENAPI_SCHEMA_FILE`` set, the schema is read from that file instead
+of being generated: write it at build time with ``python manage.py
+spectacular --file <path>`` (``.json`` files are read as JSON, anything else
+as YAML).
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+import yaml
+from django.conf import settings
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+_lock = threading.Lock()
+_documents = None
+
+
+class SchemaDocument:
+    """One rendering of the schema, plain and gzipped, with their ETags."""
+
+    def __init__(self, content, content_type, extension):
+        self.content = content
+        self.content_type = content_type
+        self.filename = f"{spectacular_settings.TITLE or 'schema'}.{extension}"
+        self.compressed = gzip.compress(content, mtime=0)
+        digest = hashlib.sha1(content).hexdigest()
+        self.etag = quote_etag(digest)
+        self.compressed_etag = quote_etag(f"{digest}-gzip")
+
+
+def generate_schema():
+    """The schema as a dict: read from ``OPENAPI_SCHEMA_FILE`` or generated."""
+    if settings.OPENAPI_SCHEMA_FILE:
+        with open(settings.OPENAPI_SCHEMA_FILE, "rb") as schema_file:
+            if str(settings.OPENAPI_SCHEMA_FILE).endswith(".json"):
+                return json.load(schema_file)
+            return yaml.safe_load(schema_file)
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+def schema_documents():
+    """``{"yaml": SchemaDocument, "json": SchemaDocument}``, built on first use."""
+    global _documents
+    if _documents is None:
+        with _lock:
+            if _documents is None:
+                schema = generate_schema()
+                _documents = {
+                    "yaml": SchemaDocument(
+                        OpenApiYamlRenderer().render(schema),
+                        OpenApiYamlRenderer.media_type,
+                        "yaml",
+                    ),
+                    "json": SchemaDocument(
+                        OpenApiJsonRenderer().render(schema),
+                        OpenApiJsonRenderer.media_type,
+                        "json",
+                    ),
+                }
+    return _documents
+
+
+def clear_schema():
+    """Forget the built schema; the next request builds it again."""
+    global _documents
+    with _lock:
+        _documents = None
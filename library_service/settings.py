@@ -13,6 +13,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,7 +49,6 @@ INSTALLED_APPS = [
     "django_filters",
     "user",
     "borrowings",
-    "debug_toolbar",
     "drf_spectacular",
 ]
 
@@ -56,7 +56,8 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "library_service.middleware.MetricsMiddleware",
+    "library_service.middleware.QueryStatsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,6 +66,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(1, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "library_service.urls"
 
 TEMPLATES = [
@@ -88,13 +93,103 @@ WSGI_APPLICATION = "library_service.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DJANGO_DB_ENGINE is "sqlite" (the default, see library_service.db.sqlite3
+# for the connection tuning) or "postgresql". Connections are kept open for
+# DJANGO_DB_CONN_MAX_AGE seconds and checked before they are reused. Set
+# DJANGO_DB_POOLED=True behind a transaction-pooling PgBouncer, which cannot
+# keep server-side cursors open across transactions.
+
+DB_ENGINE = os.environ.get("DJANGO_DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DJANGO_DB_NAME", "library"),
+            "USER": os.environ.get("DJANGO_DB_USER", ""),
+            "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", ""),
+            "HOST": os.environ.get("DJANGO_DB_HOST", ""),
+            "PORT": os.environ.get("DJANGO_DB_PORT", ""),
+            "DISABLE_SERVER_SIDE_CURSORS": (
+                os.environ.get("DJANGO_DB_POOLED", "") == "True"
+            ),
+            "OPTIONS": {
+                "connect_timeout": int(os.environ.get("DJANGO_DB_CONNECT_TIMEOUT", 5))
+            },
+        }
+    }
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "library_service.db.sqlite3",
+            "NAME": os.environ.get("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                "transaction_mode": os.environ.get("DJANGO_DB_TRANSACTION_MODE"),
+                "write_lock": os.environ.get("DJANGO_DB_WRITE_LOCK", "") == "True",
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unknown DJANGO_DB_ENGINE {DB_ENGINE!r}")
+
+DATABASES["default"].update(
+    CONN_MAX_AGE=int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 60)),
+    CONN_HEALTH_CHECKS=True,
+)
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    # The book catalog cache (see library.cache): shared by every process in
+    # production, or a borrow only refreshes the process that served it.
+    "default": {
+        "BACKEND": os.environ.get(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "library-service"),
+    },
+    # Throttle buckets (see library_service.throttling): shared by every
+    # process in production, or each process enforces its own limits.
+    "throttle": {
+        "BACKEND": os.environ.get(
+            "DJANGO_THROTTLE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get(
+            "DJANGO_THROTTLE_CACHE_LOCATION", "library-service-throttle"
+        ),
+    },
 }
 
+BOOK_CACHE_TIMEOUT = 60 * 5
+
+# How many authenticated users each process remembers, and for how long:
+# keep the timeout short, other processes see a user's changes only then.
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TIMEOUT = 30
+
+# Revoked token ids kept in each process's Bloom filter (see user.revocation).
+TOKEN_REVOCATION_CAPACITY = 100_000
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_REFRESH_INTERVAL = 5
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 10
+
+# Most borrowings a patron may have open at once.
+MAX_ACTIVE_LOANS = int(os.environ.get("MAX_ACTIVE_LOANS", 10))
+
+# Per-request query accounting (see library_service.middleware): requests
+# over budget or repeating a query shape more than QUERY_REPEAT_LIMIT times
+# are logged.
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", 20))
+QUERY_REPEAT_LIMIT = int(os.environ.get("QUERY_REPEAT_LIMIT", 5))
+QUERY_STATS_HEADERS = DEBUG
+
+# Client addresses or networks, comma-separated, that may scrape /metrics
+# (see library_service.views.metrics); staff sessions always may. Matched
+# against REMOTE_ADDR, so scrape the workers directly, not through a proxy.
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -136,15 +231,27 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "library_service.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "library_service.pagination.IdCursorPagination",
+    "PAGE_SIZE": 20,
+    "DEFAULT_THROTTLE_CLASSES": ["library_service.throttling.TokenBucketThrottle"],
+    # Proxies in front of the app: the client IP is the address this many
+    # hops back in X-Forwarded-For. 0 uses REMOTE_ADDR, ignoring the header.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
+    "DEFAULT_THROTTLE_RATES": {
+        "checkout": os.environ.get("THROTTLE_RATE_CHECKOUT", "30/min"),
+        "register": os.environ.get("THROTTLE_RATE_REGISTER", "20/hour"),
+        "token": os.environ.get("THROTTLE_RATE_TOKEN", "10/min"),
+    },
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.RevocableTokenRefreshSerializer",
 }
 
 SPECTACULAR_SETTINGS = {
@@ -153,3 +260,7 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+
+# A schema written by `manage.py spectacular --file`, served instead of
+# generating one at the first request of each process.
+OPENAPI_SCHEMA_FILE = os.environ.get("OPENAPI_SCHEMA_FILE")
@@ -0,0 +1,72 @@
+"""Test helpers shared by the apps' API tests."""
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+# "SCAN t", or "SCAN TABLE t" before SQLite 3.36, optionally followed by
+# the index the scan walks ("USING [COVERING] INDEX i"): either way it reads
+# every row of the table.
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?(?: USING .+)?$")
+
+
+class CapturedQueries(list):
+    """``(sql, params)`` of every statement run through the connection."""
+
+    def __call__(self, execute, sql, params, many, context):
+        self.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class QueryPlanAssertionsMixin:
+    """Fail a test when the queries a block runs fall back to full table scans.
+
+    Every SELECT, UPDATE and DELETE issued inside the block is replayed
+    through SQLite's ``EXPLAIN QUERY PLAN``; a plan step that reads a whole
+    table (``SCAN <table>`` without an index) fails the test unless that
+    table is listed in ``allow_scans``.
+    """
+
+    @contextmanager
+    def assertNoFullTableScans(self, allow_scans=()):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN checks need SQLite")
+
+        queries = CapturedQueries()
+        with connection.execute_wrapper(queries):
+            yield queries
+
+        for sql, params in queries:
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                scan = FULL_SCAN.match(step)
+                if scan and scan["table"] not in allow_scans:
+                    self.fail(
+                        f"Full scan of {scan['table']}:\n{sql}\n"
+                        + "\n".join(f"  {line}" for line in plan)
+                    )
+
+
+class QueryBudgetAssertionsMixin:
+    """Check the query accounting ``QueryStatsMiddleware`` attaches to responses."""
+
+    def assertWithinQueryBudget(self, response, repeat_limit=None):
+        """Fail if the view went over its ``query_budget`` or ran an N+1."""
+        stats, budget = response.query_stats, response.query_budget
+        if repeat_limit is None:
+            repeat_limit = settings.QUERY_REPEAT_LIMIT
+        problems = []
+        if stats.count > budget:
+            problems.append(f"{stats.count} queries, over the budget of {budget}")
+        problems += [f"{count}x {sql}" for sql, count in stats.repeated(repeat_limit)]
+        if problems:
+            request = response.wsgi_request
+            self.fail(
+                f"{request.method} {request.get_full_path()}:\n"
+                + "\n".join(f"  {problem}" for problem in problems)
+            )
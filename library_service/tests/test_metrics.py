@@ -0,0 +1,164 @@
+import re
+import threading
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.tests.test_book_api import sample_book
+from library_service.metrics import Registry
+
+METRICS_URL = reverse("metrics")
+
+
+class RegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_histogram(self):
+        histogram = self.registry.histogram(
+            "latency_seconds", "Latency.", ["view"], buckets=(0.1, 1)
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, "books")
+
+        self.assertEqual(
+            self.registry.render(),
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{view="books",le="0.1"} 2\n'
+            'latency_seconds_bucket{view="books",le="1"} 3\n'
+            'latency_seconds_bucket{view="books",le="+Inf"} 4\n'
+            'latency_seconds_sum{view="books"} 3.65\n'
+            'latency_seconds_count{view="books"} 4\n',
+        )
+
+    def test_unlabelled_metrics_start_at_zero(self):
+        self.registry.gauge("in_flight", "In flight.")
+
+        self.assertIn("\nin_flight 0\n", self.registry.render())
+
+    def test_label_values_escaped(self):
+        counter = self.registry.counter("events_total", "Events.", ["name"])
+        counter.inc('say "hi"\n')
+
+        self.assertIn(r'events_total{name="say \"hi\"\n"} 1', self.registry.render())
+
+    def test_duplicate_name_rejected(self):
+        self.registry.counter("events_total", "Events.")
+
+        with self.assertRaises(ValueError):
+            self.registry.gauge("events_total", "Events.")
+
+    def test_counter_thread_safe(self):
+        counter = self.registry.counter("events_total", "Events.")
+
+        def work():
+            for _ in range(10_000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn("\nevents_total 80000\n", self.registry.render())
+
+
+def sample(name, **labels):
+    """Current value of one sample on the metrics endpoint (0 if absent)."""
+    response = APIClient().get(METRICS_URL)
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)"
+    match = re.search(f"^{pattern}$", response.content.decode(), re.MULTILINE)
+    return float(match[1]) if match else 0
+
+
+class MetricsEndpointTest(TestCase):
+    def test_content_type(self):
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+
+    def test_restricted_to_allowed_clients_and_staff(self):
+        for address in ("203.0.113.7", "2001:db8::1"):
+            response = self.client.get(METRICS_URL, REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, 403)
+
+        with override_settings(METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            self.assertEqual(
+                self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3").status_code, 200
+            )
+            self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                "staff@test.com", "testpass", is_staff=True
+            )
+        )
+        response = self.client.get(METRICS_URL, REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_metrics(self):
+        labels = {"view": "BookViewSet", "action": "list"}
+        count = sample("library_http_request_duration_seconds_count", **labels)
+        ok = sample("library_http_requests_total", **labels, status=200)
+        queries = sample("library_http_request_queries_total", **labels)
+
+        self.client.get(reverse("library:book-list"))
+
+        self.assertEqual(
+            sample("library_http_request_duration_seconds_count", **labels),
+            count + 1,
+        )
+        self.assertEqual(
+            sample("library_http_requests_total", **labels, status=200), ok + 1
+        )
+        self.assertGreater(
+            sample("library_http_request_queries_total", **labels), queries
+        )
+
+    def test_checkout_counters(self):
+        caches["throttle"].clear()
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        book = sample_book(inventory=1)
+        client = APIClient()
+        client.force_authenticate(user)
+        created = sample("library_checkouts_total", result="created")
+        out_of_stock = sample("library_checkouts_total", result="out_of_stock")
+
+        client.post(reverse("borrowing:borrowing-list"), {"book": book.id})
+        client.post(reverse("borrowing:borrowing-list"), {"book": book.id})
+
+        self.assertEqual(
+            sample("library_checkouts_total", result="created"), created + 1
+        )
+        self.assertEqual(
+            sample("library_checkouts_total", result="out_of_stock"), out_of_stock + 1
+        )
+
+    def test_failed_commit_not_counted(self):
+        caches["throttle"].clear()
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        book = sample_book()
+        client = APIClient()
+        client.force_authenticate(user)
+        created = sample("library_checkouts_total", result="created")
+
+        # In a test the checkout's transaction is a savepoint.
+        with mock.patch.object(
+            connection, "savepoint_commit", side_effect=DatabaseError("commit failed")
+        ):
+            with self.assertRaises(DatabaseError):
+                client.post(reverse("borrowing:borrowing-list"), {"book": book.id})
+
+        self.assertEqual(sample("library_checkouts_total", result="created"), created)
@@ -0,0 +1,74 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from library.models import Book
+from library.tests.test_book_api import sample_book
+from library_service.middleware import QueryStatsMiddleware
+from library_service.testing import QueryBudgetAssertionsMixin
+
+
+def n_plus_one_view(request):
+    for book in Book.objects.order_by("id"):
+        Book.objects.filter(pk=book.pk).exists()
+    return HttpResponse()
+
+
+class QueryStatsMiddlewareTest(QueryBudgetAssertionsMixin, TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/books/")
+        self.request.resolver_match = None
+
+    def test_counts_queries(self):
+        sample_book()
+        middleware = QueryStatsMiddleware(n_plus_one_view)
+
+        response = middleware(self.request)
+
+        self.assertEqual(response.query_stats.count, 2)
+        self.assertGreater(response.query_stats.duration, 0)
+
+    @override_settings(QUERY_REPEAT_LIMIT=2)
+    def test_repeated_query_logged(self):
+        for number in range(3):
+            sample_book(title=f"Title {number}", author=f"Author {number}")
+        middleware = QueryStatsMiddleware(n_plus_one_view)
+
+        with self.assertLogs("library_service.queries", "WARNING") as logs:
+            response = middleware(self.request)
+
+        self.assertIn("3x SELECT", logs.output[0])
+        self.assertEqual(len(response.query_stats.repeated(2)), 1)
+
+    @override_settings(QUERY_BUDGET=0)
+    def test_over_budget_fails_assertion(self):
+        with self.assertLogs("library_service.queries", "WARNING"):
+            response = QueryStatsMiddleware(n_plus_one_view)(self.request)
+        response.wsgi_request = self.request
+
+        with self.assertRaisesMessage(AssertionError, "over the budget of 0"):
+            self.assertWithinQueryBudget(response)
+
+    @override_settings(QUERY_STATS_HEADERS=True)
+    def test_headers(self):
+        response = self.client.get(reverse("library:book-list"))
+
+        self.assertEqual(response["X-Query-Count"], str(response.query_stats.count))
+        self.assertTrue(response["Server-Timing"].startswith("db;dur="))
+
+    def test_view_budget(self):
+        response = self.client.get(reverse("library:book-list"))
+
+        self.assertEqual(response.query_budget, 3)
+
+    def test_async_view_queries_counted(self):
+        book = sample_book()
+        url = reverse("library:async-book-detail", args=[book.id])
+
+        async def get():
+            return await self.async_client.get(url)
+
+        response = async_to_sync(get)()
+
+        self.assertEqual(response.query_stats.count, 1)
@@ -0,0 +1,112 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from library_service import schema
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaViewTest(SimpleTestCase):
+    def setUp(self):
+        schema.clear_schema()
+        self.addCleanup(schema.clear_schema)
+
+    def test_yaml_by_default(self):
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/vnd.oai.openapi")
+        self.assertTrue(response.content.startswith(b"openapi: 3"))
+        self.assertIn(b"/api/library/books/", response.content)
+
+    def test_json_format(self):
+        for kwargs in (
+            {"data": {"format": "json"}},
+            {"HTTP_ACCEPT": "application/json"},
+        ):
+            response = self.client.get(SCHEMA_URL, **kwargs)
+
+            self.assertEqual(
+                response["Content-Type"], "application/vnd.oai.openapi+json"
+            )
+            self.assertEqual(
+                json.loads(response.content)["info"]["title"], "Library API"
+            )
+
+    def test_generated_once(self):
+        with mock.patch.object(
+            schema, "generate_schema", wraps=schema.generate_schema
+        ) as generate:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL, {"format": "json"})
+            third = self.client.get(SCHEMA_URL)
+
+        generate.assert_called_once()
+        self.assertEqual(first.content, third.content)
+        self.assertNotEqual(first.content, second.content)
+
+    def test_not_modified(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_gzip(self):
+        plain = self.client.get(SCHEMA_URL)
+        response = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content) / 4)
+
+    def test_gzip_refused(self):
+        for accept_encoding in ("gzip;q=0, br", "br, gzip; q=0.0", "*;q=0", ""):
+            response = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertTrue(response.content.startswith(b"openapi: 3"))
+
+        response = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="br, *;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_read_from_file(self):
+        document = {"openapi": "3.0.3", "info": {"title": "From file"}, "paths": {}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schema.json")
+            with open(path, "w") as schema_file:
+                json.dump(document, schema_file)
+
+            with override_settings(OPENAPI_SCHEMA_FILE=path):
+                response = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(json.loads(response.content), document)
+
+    def test_jwt_security_scheme(self):
+        document = json.loads(self.client.get(SCHEMA_URL, {"format": "json"}).content)
+
+        self.assertEqual(
+            document["components"]["securitySchemes"]["jwtAuth"],
+            {"type": "http", "scheme": "bearer", "bearerFormat": "JWT"},
+        )
+        borrowings = document["paths"]["/api/borrowings/"]["get"]
+        self.assertIn({"jwtAuth": []}, borrowings["security"])
+
+    def test_post_not_allowed(self):
+        self.assertEqual(self.client.post(SCHEMA_URL).status_code, 405)
+
+    def test_docs_reference_cached_schema(self):
+        for name in ("swagger-ui", "redoc"):
+            response = self.client.get(reverse(name))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, SCHEMA_URL)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import time
+
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+
+from library_service.db.sqlite3.base import DatabaseWrapper
+
+
+def pragma(conn, name):
+    with conn.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+class ConnectionPragmasTest(TestCase):
+    def test_pragmas_set_on_connect(self):
+        self.assertEqual(pragma(connection, "synchronous"), 1)
+        self.assertEqual(pragma(connection, "busy_timeout"), 5000)
+        self.assertEqual(pragma(connection, "foreign_keys"), 1)
+
+
+class FileDatabaseTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, "library.db")
+
+    def connect(self, **options):
+        conn = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                "NAME": self.name,
+                "OPTIONS": {"pragmas": {"busy_timeout": 0}, **options},
+            }
+        )
+        self.addCleanup(conn.close)
+        return conn
+
+    def begin(self, conn):
+        conn.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+
+    def end(self, conn):
+        conn.rollback()
+        conn.set_autocommit(True)
+
+    def test_wal_mode(self):
+        conn = self.connect()
+
+        self.assertEqual(pragma(conn, "journal_mode"), "wal")
+        self.assertEqual(pragma(conn, "mmap_size"), 256 * 1024 * 1024)
+
+    def test_deferred_without_lock_by_default(self):
+        first, second = self.connect(), self.connect()
+        self.begin(first)
+        pragma(first, "user_version")
+
+        self.begin(second)
+        pragma(second, "user_version")
+
+        self.assertIsNone(first._write_lock)
+        self.end(first)
+        self.end(second)
+
+    def test_immediate_mode(self):
+        first = self.connect(transaction_mode="IMMEDIATE")
+        second = self.connect(transaction_mode="IMMEDIATE")
+        self.begin(first)
+
+        with self.assertRaisesMessage(OperationalError, "database is locked"):
+            self.begin(second)
+
+        first.commit()
+        first.set_autocommit(True)
+        self.begin(second)
+        self.end(second)
+
+    def test_write_lock_released_when_transaction_ends(self):
+        for finish in ("commit", "rollback", "close"):
+            with self.subTest(finish):
+                first = self.connect(write_lock=True)
+                second = self.connect(write_lock=True)
+                self.begin(first)
+                self.assertTrue(first._write_lock.locked())
+
+                getattr(first, finish)()
+
+                self.assertFalse(first._write_lock.locked())
+                self.begin(second)
+                self.assertTrue(second._write_lock.locked())
+                self.end(second)
+                first.close()
+                self.assertFalse(second._write_lock.locked())
+
+    def test_write_lock_timeout(self):
+        first = self.connect(write_lock=True)
+        second = self.connect(write_lock=True, pragmas={"busy_timeout": 50})
+        self.begin(first)
+
+        started = time.monotonic()
+        with self.assertRaisesMessage(OperationalError, "database is locked"):
+            self.begin(second)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertFalse(second._holds_write_lock)
+        self.assertTrue(second.get_autocommit())
+        self.end(first)
+        self.begin(second)
+        self.end(second)
@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from library.tests.test_book_api import sample_book
+from library_service.throttling import parse_rate
+
+BORROWING_URL = reverse("borrowing:borrowing-list")
+REGISTER_URL = reverse("user:create")
+TOKEN_URL = reverse("user:token_obtain_pair")
+
+RATES = {"checkout": "3/min", "register": "2/hour", "token": "2/min"}
+
+
+@mock.patch.dict("rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES", RATES)
+class TokenBucketThrottleTest(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.now = 1_700_000_000.0
+        patcher = mock.patch("library_service.throttling.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = get_user_model().objects.create_user(
+            "reader@test.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.book = sample_book(inventory=100)
+
+    def checkout(self, client=None):
+        return (client or self.client).post(BORROWING_URL, {"book": self.book.id})
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/min"), (10, 6_000_000))
+        self.assertEqual(parse_rate("2/hour"), (2, 1_800_000_000))
+        self.assertEqual(parse_rate("2000/sec"), (2000, 500))
+
+    def test_burst_then_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.checkout().status_code, 201)
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "20")
+
+    def test_refills_at_the_rate(self):
+        for _ in range(3):
+            self.checkout()
+
+        self.now += 19
+        self.assertEqual(self.checkout().status_code, 429)
+        self.now += 1
+        self.assertEqual(self.checkout().status_code, 201)
+        self.assertEqual(self.checkout().status_code, 429)
+
+    def test_refused_requests_do_not_drain_the_bucket(self):
+        for _ in range(3):
+            self.checkout()
+        for _ in range(5):
+            self.checkout()
+
+        self.now += 20
+
+        self.assertEqual(self.checkout().status_code, 201)
+
+    def test_bucket_per_user(self):
+        for _ in range(3):
+            self.checkout()
+        other = APIClient()
+        other.force_authenticate(
+            get_user_model().objects.create_user("other@test.com", "password123")
+        )
+
+        self.assertEqual(self.checkout(other).status_code, 201)
+
+    def test_other_actions_not_throttled(self):
+        for _ in range(3):
+            self.checkout()
+
+        self.assertEqual(self.client.get(BORROWING_URL).status_code, 200)
+
+    def test_registration_by_ip(self):
+        client = APIClient()
+        for i in range(2):
+            response = client.post(
+                REGISTER_URL, {"email": f"new{i}@test.com", "password": "pass12345"}
+            )
+            self.assertEqual(response.status_code, 201)
+
+        response = client.post(
+            REGISTER_URL, {"email": "new2@test.com", "password": "pass12345"}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1800")
+
+        response = client.post(
+            REGISTER_URL,
+            {"email": "new2@test.com", "password": "pass12345"},
+            REMOTE_ADDR="10.0.0.2",
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_forwarded_for_not_trusted(self):
+        client = APIClient()
+        for i in range(2):
+            client.post(
+                REGISTER_URL, {"email": f"new{i}@test.com", "password": "pass12345"}
+            )
+
+        response = client.post(
+            REGISTER_URL,
+            {"email": "new2@test.com", "password": "pass12345"},
+            HTTP_X_FORWARDED_FOR="10.0.0.3",
+        )
+
+        self.assertEqual(response.status_code, 429)
+
+    def test_token_attempts(self):
+        credentials = {"email": "reader@test.com", "password": "wrong"}
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post(TOKEN_URL, credentials).status_code, 401)
+
+        self.assertEqual(client.post(TOKEN_URL, credentials).status_code, 429)
+
+    def test_token_attempts_per_account(self):
+        credentials = {"email": "reader@test.com", "password": "wrong"}
+        client = APIClient()
+        for i in range(2):
+            response = client.post(TOKEN_URL, credentials, REMOTE_ADDR=f"10.0.1.{i}")
+            self.assertEqual(response.status_code, 401)
+
+        response = client.post(
+            TOKEN_URL,
+            {**credentials, "email": "Reader@test.com"},
+            REMOTE_ADDR="10.0.1.2",
+        )
+        self.assertEqual(response.status_code, 429)
+
+        # The refused attempt took nothing from its address's bucket.
+        response = client.post(
+            TOKEN_URL,
+            {**credentials, "email": "other@test.com"},
+            REMOTE_ADDR="10.0.1.2",
+        )
+        self.assertEqual(response.status_code, 401)
+        response = client.post(
+            TOKEN_URL,
+            {**credentials, "email": "other@test.com"},
+            REMOTE_ADDR="10.0.1.2",
+        )
+        self.assertEqual(response.status_code, 401)
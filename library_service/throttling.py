@@ -0,0 +1,98 @@
+"""Token-bucket throttling for the endpoints that are expensive to hammer.
+
+``TokenBucketThrottle`` applies to views that set ``throttle_scope``: a
+scope name, or a dict of scope names by viewset action. The rate of each
+scope is in ``DEFAULT_THROTTLE_RATES``: ``"10/min"`` is a bucket of 10
+requests that refills at 10 a minute. Buckets are per user, or per client
+IP for anonymous requests (see ``NUM_PROXIES``), and live in the
+``throttle`` cache, which has to be shared (Redis, memcached) for the limits
+to hold across processes. A view can also name a ``throttle_field`` of the
+request data: each value of it gets a bucket of its own, and a request has
+to fit in both.
+
+A bucket is stored as the time it will be full again, in microseconds (the
+GCRA form of a token bucket). Every request pushes that time one interval
+further with a single atomic ``incr``; a request that would push it more
+than a full bucket ahead of now is refused, and its increment taken back.
+"""
+import hashlib
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Keys expire after this many refills of their bucket. A client that keeps
+# its bucket drained for that long gets one free refill when the key goes,
+# at most a tenth over its rate.
+KEY_LIFETIME_REFILLS = 10
+
+
+@lru_cache
+def parse_rate(rate):
+    """``"10/min"`` as ``(10, 6_000_000)``: bucket size and refill interval in µs."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, PERIODS[period[0]] * 1_000_000 // count
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if isinstance(scope, dict):
+            scope = scope.get(getattr(view, "action", None))
+        if scope is None:
+            return True
+
+        capacity, interval = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[scope])
+        cache = caches["throttle"]
+        now = int(time.time() * 1_000_000)
+
+        taken = []
+        for key in self.get_keys(request, view, scope):
+            if not self.take(cache, key, capacity, interval, now):
+                # Refused by this bucket: give back what the others took.
+                for taken_key in taken:
+                    cache.decr(taken_key, interval)
+                return False
+            taken.append(key)
+        return True
+
+    def get_keys(self, request, view, scope):
+        if request.user and request.user.is_authenticated:
+            yield f"throttle:{scope}:user:{request.user.pk}"
+        else:
+            yield f"throttle:{scope}:ip:{self.get_ident(request)}"
+
+        field = getattr(view, "throttle_field", None)
+        if field is None or not isinstance(request.data, Mapping):
+            return
+        value = request.data.get(field)
+        if value:
+            digest = hashlib.sha1(str(value).strip().lower().encode()).hexdigest()
+            yield f"throttle:{scope}:{field}:{digest}"
+
+    def take(self, cache, key, capacity, interval, now):
+        try:
+            full_at = cache.incr(key, interval)
+        except ValueError:
+            full_at = None
+        if full_at is None or full_at - interval < now:
+            # A new or full bucket. Concurrent requests may overwrite each
+            # other's increments here, in the client's favour.
+            timeout = capacity * interval * KEY_LIFETIME_REFILLS / 1_000_000
+            cache.set(key, now + interval, timeout)
+            return True
+        if full_at - now <= capacity * interval:
+            return True
+
+        cache.decr(key, interval)
+        self.retry_after = (full_at - now - capacity * interval) / 1_000_000
+        return False
+
+    def wait(self):
+        return self.retry_after
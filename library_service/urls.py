@@ -14,21 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from library_service import views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", views.metrics, name="metrics"),
     path("api/library/", include("library.urls", namespace="library")),
     path("api/users/", include("user.urls", namespace="user")),
     path("api/", include("borrowings.urls", namespace="borrowing")),
-    path("__debug__/", include("debug_toolbar.urls")),
-    path("api/doc/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/doc/", views.schema, name="schema"),
     path(
         "api/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -38,3 +37,6 @@ urlpatterns = [
         "api/doc/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"
     ),
 ]
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
@@ -0,0 +1,83 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from library_service.conditional import conditional_response, set_validators
+from library_service.metrics import CONTENT_TYPE, registry
+from library_service.schema import schema_documents
+
+
+def metrics_allowed(request):
+    """Whether the client is staff or in ``METRICS_ALLOWED_IPS``."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network.strip(), strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+        if network.strip()
+    )
+
+
+def metrics(request):
+    """The process's metrics, for Prometheus to scrape.
+
+    They show the traffic and checkouts of the whole service, so only staff
+    and the addresses in ``METRICS_ALLOWED_IPS`` get them.
+    """
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
+def schema_format(request):
+    """``?format=json|yaml``, else JSON if the client accepts it, else YAML."""
+    format = request.GET.get("format")
+    if format in ("json", "yaml"):
+        return format
+    accept = request.headers.get("Accept", "")
+    return "json" if "json" in accept and "yaml" not in accept else "yaml"
+
+
+def accepts_gzip(request):
+    """Whether ``Accept-Encoding`` allows gzip: listed, or ``*``, with q > 0."""
+    qualities = {}
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+@require_safe
+def schema(request):
+    """The cached OpenAPI schema, gzipped for clients that accept it."""
+    document = schema_documents()[schema_format(request)]
+    compressed = accepts_gzip(request)
+    etag = document.compressed_etag if compressed else document.etag
+
+    response = conditional_response(request, etag)
+    if response is None:
+        response = HttpResponse(
+            document.compressed if compressed else document.content,
+            content_type=document.content_type,
+        )
+        response["Content-Disposition"] = f'inline; filename="{document.filename}"'
+        if compressed:
+            response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+    return set_validators(response, etag)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the revoked tokens that have expired and can no longer be used. "
+        "Run it periodically (cron, a scheduler) so RevokedToken stays small."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = RevokedToken.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(f"{deleted} expired revoked tokens deleted")
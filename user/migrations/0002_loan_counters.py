@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active_loans(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Borrowing = apps.get_model("borrowings", "Borrowing")
+    User.objects.update(
+        active_loans=Coalesce(
+            Subquery(
+                Borrowing.objects.filter(user=OuterRef("pk"), is_active=True)
+                .order_by()
+                .values("user")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0001_initial"),
+        ("borrowings", "0004_fines"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="active_loans",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="outstanding_fees",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="overdue_loans",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_active_loans, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,36 @@
 from django.db import models
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
 from django.utils.translation import gettext as _
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    # Changed on every checkout and return, and never read from the users of
+    # the authentication cache (the profile loads its own row).
+    LOAN_COUNTERS = {"active_loans", "overdue_loans", "outstanding_fees"}
+
+    def update(self, **kwargs):
+        """Update the users and drop them from the authentication cache.
+
+        Queryset updates send no signals, so without this a user deactivated
+        or demoted in bulk (an admin action, a script) would keep
+        authenticating with their old flags. Updates of the loan counters
+        alone skip the query for the users' keys.
+        """
+        if kwargs.keys() <= self.LOAN_COUNTERS:
+            return super().update(**kwargs)
+
+        from library_service.authentication import user_cache
+
+        pks = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        for pk in pks:
+            user_cache.invalidate(str(pk))
+        return updated
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Define a model manager for User model with no username field."""
 
     use_in_migrations = True
@@ -36,14 +63,95 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    def take_loan(self, pk, limit):
+        """Count one more open loan for the user unless ``limit`` is reached.
+
+        The limit check and the increment are a single conditional UPDATE,
+        so concurrent checkouts can never push the user past the limit.
+        Returns True if the loan was counted.
+        """
+        return bool(
+            self.filter(pk=pk, active_loans__lt=limit).update(
+                active_loans=F("active_loans") + 1
+            )
+        )
+
+    def take_loans(self, pk, count, limit):
+        """Count up to ``count`` more open loans, stopping at ``limit``.
+
+        Must run inside a transaction: the user row is locked while the loans
+        are allocated. Returns how many loans were counted.
+        """
+        active = (
+            self.select_for_update()
+            .filter(pk=pk)
+            .values_list("active_loans", flat=True)
+            .get()
+        )
+        taken = max(0, min(count, limit - active))
+        if taken:
+            self.filter(pk=pk).update(active_loans=F("active_loans") + taken)
+        return taken
+
+    def return_loans(self, returned, overdue):
+        """Uncount ``returned[pk]`` open loans, ``overdue[pk]`` of them late.
+
+        One UPDATE for all users. Counters never drop below zero, so loans
+        made outside the API only leave drift for ``reconcile_loan_counters``.
+        """
+        if returned:
+            self.filter(pk__in=returned).update(
+                active_loans=Case(
+                    *[
+                        When(
+                            pk=pk,
+                            then=Greatest(
+                                F("active_loans") - count,
+                                0,
+                                output_field=models.PositiveIntegerField(),
+                            ),
+                        )
+                        for pk, count in returned.items()
+                    ]
+                ),
+                overdue_loans=Case(
+                    *[
+                        When(
+                            pk=pk,
+                            then=Greatest(
+                                F("overdue_loans") - count,
+                                0,
+                                output_field=models.PositiveIntegerField(),
+                            ),
+                        )
+                        for pk, count in overdue.items()
+                    ],
+                    default=F("overdue_loans"),
+                ),
+            )
+
 
 class User(AbstractUser):
     """User model."""
 
     username = None
     email = models.EmailField(_("email address"), unique=True)
+    active_loans = models.PositiveIntegerField(default=0)
+    overdue_loans = models.PositiveIntegerField(default=0)
+    outstanding_fees = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+class RevokedToken(models.Model):
+    """A JWT, access or refresh, that was revoked before it expired."""
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,136 @@
+"""Revoked token lookups that cost microseconds instead of a query.
+
+Each process keeps the ids (``jti``) of the revoked, unexpired tokens in a
+Bloom filter. A token missing from the filter is certainly not revoked; a
+hit is confirmed against ``RevokedToken``, so false positives only cost a
+query and never reject a valid token.
+
+The filter picks up tokens revoked by other processes every
+``TOKEN_REVOCATION_REFRESH_INTERVAL`` seconds and is rebuilt from scratch
+every ``TOKEN_REVOCATION_REBUILD_INTERVAL`` seconds, leaving out the tokens
+that have expired (refresh tokens at the latest after
+``REFRESH_TOKEN_LIFETIME``). Both only read, inside whichever request finds
+them due; the expired rows are deleted by the ``prune_revoked_tokens``
+command, run periodically.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from user.models import RevokedToken
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter of strings for ``capacity`` items."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(-(-self.size // 8))
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationList:
+    def __init__(self, capacity, error_rate, refresh_interval, rebuild_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next lookup rebuilds the filter."""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._loaded_since = None
+            self._next_refresh = self._next_rebuild = 0
+
+    def _rebuild(self, now):
+        live = RevokedToken.objects.filter(expires_at__gt=now)
+        bloom = BloomFilter(max(self.capacity, 2 * live.count()), self.error_rate)
+        for jti in live.values_list("jti", flat=True).iterator():
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _refresh(self, now):
+        # Overlap the previous load so rows committed late are not missed.
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=self._loaded_since
+            - timedelta(seconds=self.refresh_interval),
+            expires_at__gt=now,
+        ).values_list("jti", flat=True):
+            self._bloom.add(jti)
+
+    def refresh(self):
+        """Load the tokens revoked elsewhere if a refresh is due."""
+        clock = time.monotonic()
+        if clock < self._next_refresh:
+            return
+        with self._lock:
+            if clock < self._next_refresh:
+                return
+            now = timezone.now()
+            if clock >= self._next_rebuild:
+                self._rebuild(now)
+                self._next_rebuild = clock + self.rebuild_interval
+            else:
+                self._refresh(now)
+            self._loaded_since = now
+            self._next_refresh = clock + self.refresh_interval
+
+    def rules_out(self, jti):
+        """True if ``jti`` is certainly not revoked, known without a query.
+
+        ``False`` only means ``is_revoked`` has to decide: the filter is due
+        a refresh or matches ``jti``.
+        """
+        return time.monotonic() < self._next_refresh and jti not in self._bloom
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self._bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        """Revoke a validated simplejwt token until it expires."""
+        jti = token[api_settings.JTI_CLAIM]
+        RevokedToken.objects.get_or_create(
+            jti=jti, defaults={"expires_at": datetime_from_epoch(token["exp"])}
+        )
+        with self._lock:
+            self._bloom.add(jti)
+
+
+revoked_tokens = RevocationList(
+    capacity=settings.TOKEN_REVOCATION_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_INTERVAL,
+    rebuild_interval=settings.TOKEN_REVOCATION_REBUILD_INTERVAL,
+)
@@ -1,14 +1,33 @@
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from user.models import User
+from user.revocation import revoked_tokens
 
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
-        fields = ("id", "email", "password", "is_staff")
-        read_only_fields = ("is_staff",)
+        fields = (
+            "id",
+            "email",
+            "password",
+            "is_staff",
+            "active_loans",
+            "overdue_loans",
+            "outstanding_fees",
+        )
+        read_only_fields = (
+            "is_staff",
+            "active_loans",
+            "overdue_loans",
+            "outstanding_fees",
+        )
         extra_kwargs = {"password": {"write_only": True, "min_length": 5}}
 
     def create(self, validated_data):
@@ -16,11 +35,42 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
-        """Update a user, set the password correctly and return it"""
+        """Update a user, set the password correctly and return it
+
+        Only the edited columns are written, so a profile update never
+        overwrites loan counters changed since the user was loaded.
+        """
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            update_fields.append("password")
+        instance.save(update_fields=update_fields)
+
+        return instance
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        """Refuse to issue access tokens from a revoked refresh token."""
+        refresh = self.token_class(attrs["refresh"])
+        if revoked_tokens.is_revoked(refresh.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
 
-        return user
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        if str(token.get(api_settings.USER_ID_CLAIM)) != str(
+            self.context["request"].user.pk
+        ):
+            raise serializers.ValidationError("Token belongs to another user.")
+        return token
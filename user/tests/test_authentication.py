@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from borrowings.models import Borrowing
+from library.models import Book
+from library_service.authentication import user_cache
+from user.revocation import revoked_tokens
+
+BORROWING_URL = reverse("borrowing:borrowing-list")
+PROFILE_URL = reverse("user:profile")
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self) -> None:
+        user_cache.clear()
+        revoked_tokens.refresh()
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_loaded_once(self):
+        with self.assertNumQueries(2):
+            self.client.get(BORROWING_URL)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(BORROWING_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_queryset_update_invalidates(self):
+        self.client.get(BORROWING_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_loan_counter_update_keeps_cache(self):
+        self.client.get(BORROWING_URL)
+
+        with self.assertNumQueries(1):
+            get_user_model().objects.take_loan(self.user.pk, 10)
+        with self.assertNumQueries(1):
+            self.client.get(BORROWING_URL)
+
+    def test_staff_change_applies_immediately(self):
+        other = get_user_model().objects.create_user("other.test@test.com", "pass")
+        book = Book.objects.create(
+            title="Testtitle", author="TestAuthor", inventory=1, daily_fee="1.00"
+        )
+        Borrowing.objects.create(user=other, book=book)
+        self.assertEqual(self.client.get(BORROWING_URL).data["results"], [])
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(BORROWING_URL)
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_profile_update_invalidates(self):
+        self.client.get(PROFILE_URL)
+
+        self.client.patch(PROFILE_URL, {"email": "new.test@test.com"})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(PROFILE_URL)
+        self.assertEqual(response.data["email"], "new.test@test.com")
+
+    def test_profile_shows_live_counters(self):
+        self.client.get(PROFILE_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(active_loans=2)
+
+        response = self.client.get(PROFILE_URL)
+        self.assertEqual(response.data["active_loans"], 2)
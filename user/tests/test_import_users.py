@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+
+
+class ImportUsersTest(TestCase):
+    def setUp(self) -> None:
+        get_user_model().objects.create_user("existing@test.com", "testpass")
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_users", path, "--workers", "2", *args, stdout=out, stderr=err
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        path = self.write(
+            ".csv",
+            "email,password,first_name,last_name\n"
+            "ann@test.com,ann-Pass-2023,Ann,Lee\n"
+            "bob@test.com,bob-Pass-2023,Bob,\n"
+            "existing@test.com,other-Pass-2023,,\n"
+            "ann@test.com,again-Pass-2023,,\n"
+            "not-an-email,any-Pass-2023,,\n",
+        )
+
+        out, err = self.run_import(path, "--batch-size", "2")
+
+        self.assertIn("5 rows: 2 created, 2 duplicates, 1 invalid", out)
+        self.assertIn("Line 6: Invalid email 'not-an-email'", err)
+        ann = get_user_model().objects.get(email="ann@test.com")
+        self.assertEqual((ann.first_name, ann.last_name), ("Ann", "Lee"))
+        self.assertTrue(ann.check_password("ann-Pass-2023"))
+        self.assertTrue(
+            get_user_model()
+            .objects.get(email="bob@test.com")
+            .check_password("bob-Pass-2023")
+        )
+
+    def test_import_jsonl(self):
+        path = self.write(
+            ".jsonl",
+            json.dumps({"email": "ann@TEST.com", "password": "ann-Pass-2023"})
+            + "\n{broken\n\n"
+            + json.dumps({"email": "nopass@test.com"})
+            + "\n",
+        )
+
+        out, err = self.run_import(path)
+
+        self.assertIn("3 rows: 2 created, 0 duplicates, 1 invalid", out)
+        self.assertIn("Line 2: Invalid JSON", err)
+        self.assertTrue(
+            get_user_model()
+            .objects.get(email="ann@test.com")
+            .check_password("ann-Pass-2023")
+        )
+        self.assertFalse(
+            get_user_model().objects.get(email="nopass@test.com").has_usable_password()
+        )
+
+    def test_weak_passwords_rejected(self):
+        path = self.write(
+            ".csv",
+            "email,password,first_name\n"
+            "ann@test.com,ann-Pass-2023,Ann\n"
+            "bob@test.com,short,Bob\n"
+            "carol@test.com,password123,Carol\n",
+        )
+
+        out, err = self.run_import(path)
+
+        self.assertIn("3 rows: 1 created, 0 duplicates, 2 invalid", out)
+        self.assertIn("Line 3: Invalid password: This password is too short.", err)
+        self.assertIn("Line 4: Invalid password: This password is too common.", err)
+        self.assertFalse(get_user_model().objects.filter(email="bob@test.com").exists())
+
+    def test_reimport(self):
+        path = self.write(
+            ".csv",
+            "email,password\nann@test.com,ann-Pass-2023\nbob@test.com,bob-Pass-2023\n",
+        )
+        self.run_import(path)
+
+        out, _ = self.run_import(path)
+
+        self.assertIn("2 rows: 0 created, 2 duplicates, 0 invalid", out)
+        self.assertEqual(get_user_model().objects.count(), 3)
+
+    def test_emails_registered_during_import(self):
+        path = self.write(
+            ".csv",
+            "email,password\nann@test.com,ann-Pass-2023\nbob@test.com,bob-Pass-2023\n",
+        )
+        bulk_create = QuerySet.bulk_create
+
+        def register_first(queryset, users, **kwargs):
+            get_user_model().objects.create_user("ann@test.com", "other-Pass-2023")
+            return bulk_create(queryset, users, **kwargs)
+
+        with mock.patch.object(QuerySet, "bulk_create", register_first):
+            out, _ = self.run_import(path)
+
+        self.assertIn("2 rows: 1 created, 1 duplicates, 0 invalid", out)
+        self.assertTrue(
+            get_user_model()
+            .objects.get(email="ann@test.com")
+            .check_password("other-Pass-2023")
+        )
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.models import RevokedToken
+from user.revocation import BloomFilter, revoked_tokens
+
+LOGOUT_URL = reverse("user:logout")
+PROFILE_URL = reverse("user:profile")
+REFRESH_URL = reverse("user:token_refresh")
+
+
+class BloomFilterTest(TestCase):
+    def test_membership(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenRevocationTest(TestCase):
+    def setUp(self) -> None:
+        revoked_tokens.reset()
+        self.user = get_user_model().objects.create_user(
+            "user.test@test.com", "testpass"
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def test_logout_revokes_tokens(self):
+        response = self.client.post(LOGOUT_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(PROFILE_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = APIClient().post(REFRESH_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_rejects_other_users_token(self):
+        other = get_user_model().objects.create_user("other.test@test.com", "pass")
+
+        response = self.client.post(
+            LOGOUT_URL, {"refresh": str(RefreshToken.for_user(other))}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_revocation_from_other_process_seen_after_refresh(self):
+        self.client.get(PROFILE_URL)
+
+        RevokedToken.objects.create(
+            jti=self.access["jti"],
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        revoked_tokens._next_refresh = 0
+
+        response = self.client.get(PROFILE_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unrevoked_token_checked_without_query(self):
+        revoked_tokens.refresh()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked("not-revoked"))
+
+    def test_expired_tokens_left_out_of_rebuild(self):
+        RevokedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        RevokedToken.objects.create(
+            jti="live", expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        with self.assertNumQueries(3):
+            self.assertTrue(revoked_tokens.is_revoked("live"))
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked("expired"))
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+    def test_prune_expired_tokens(self):
+        RevokedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        RevokedToken.objects.create(
+            jti="live", expires_at=timezone.now() + timedelta(days=1)
+        )
+        out = StringIO()
+
+        call_command("prune_revoked_tokens", stdout=out)
+
+        self.assertIn("1 expired revoked tokens deleted", out.getvalue())
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["live"]
+        )
@@ -1,17 +1,19 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+
+from user.views import (
+    CreateUserView,
+    LogoutView,
+    ManageUserView,
     TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView,
 )
 
-from user.views import CreateUserView, ManageUserView
-
 app_name = "user"
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("me/", ManageUserView.as_view(), name="profile"),
 ]
@@ -1,12 +1,24 @@
+from django.contrib.auth import get_user_model
 from django.shortcuts import render
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt import views as jwt_views
 
-from user.serializers import UserSerializer
+from user.revocation import revoked_tokens
+from user.serializers import LogoutSerializer, UserSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_scope = "register"
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    # Each attempt runs a password hash: limit how fast they can come, from
+    # each client and against each account.
+    throttle_scope = "token"
+    throttle_field = get_user_model().USERNAME_FIELD
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -14,4 +26,22 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the authentication cache; the profile
+        # shows live loan counters and must save over the current row.
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+class LogoutView(generics.GenericAPIView):
+    serializer_class = LogoutSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Revoke the given refresh token and the access token of this call."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        revoked_tokens.revoke(serializer.validated_data["refresh"])
+        if request.auth is not None:
+            revoked_tokens.revoke(request.auth)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)